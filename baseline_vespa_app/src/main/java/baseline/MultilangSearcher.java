@@ -71,6 +71,10 @@ public class MultilangSearcher extends Searcher {
             queryItems.add(root);
         }
 
+        // Collect the phrases of all query items first, so they get translated in a single batch request
+        List<Integer> phraseItemIndices = new ArrayList<>();
+        List<List<String>> phraseWords = new ArrayList<>();
+        List<TranslationRequest> translationRequests = new ArrayList<>();
         for (int i = 0; i<queryItems.size(); i++) {
             Item queryItem = queryItems.get(i);
             String queryBody = "";
@@ -102,110 +106,119 @@ public class MultilangSearcher extends Searcher {
                         .map(token -> token.getOrig())
                         .collect(Collectors.toList());
 
-                try {
-                    // Launch translation request to the word2word translation container
-                    MultiTranslation multiTranslation = translator.multiTranslate(words, detectedLanguage.languageCode());
-                    multiTranslationList.add(multiTranslation);
-                    query.trace("Translator result: " + gson.toJson(multiTranslation), true, 2);
-
-                    // Normalize and stem all translated terms with the language-specific stemmer
-                    Map<String, List<StemList>> stems = new HashMap<>();
-                    for (MultiTranslationPart translationPart : multiTranslation.getTranslations()) {
-                        List<StemList> stemListList = new ArrayList<>();
-                        for (String word : translationPart.getContent()) {
-                            word = linguistics.getNormalizer().normalize(word);
-                            if (word.equals("")) {
-                                stemListList.add(new StemList(word));
-                            } else {
-                                stemListList.addAll(linguistics.getStemmer()
-                                        .stem(word, StemMode.DEFAULT, Language.fromLanguageTag(translationPart.getLanguageCode()))
-                                );
-                            }
-                        }
-                        stems.put(translationPart.getLanguageCode(), stemListList);
-                    }
-                    query.trace("Stemmed translations: " + gson.toJson(stems), false, 2);
-
-//                    RankItem rankItem = new RankItem();
-                    WeakAndItem weakAndItem = new WeakAndItem();
-                    OrItem languageOrItem = new OrItem();
-                    //Extend query with clauses, which equally rank translated terms to their original counterparts
-
-                    String finalFilterLanguage = filterLanguage;
-                    stems.forEach((language, stemLists) -> {
-                        if (finalFilterLanguage.equals("") || finalFilterLanguage.equals(language)) {
-                            AndItem languageAndItem = new AndItem();
-                            WeakAndItem langWeakAndItem = new WeakAndItem();
-                            stemLists.forEach(wordStems -> {
-                                if (wordStems.size() > 1) {
-                                    PhraseItem compositeStemsItem = new PhraseItem();
-                                    for (String stem : wordStems) {
-                                        compositeStemsItem.addItem(new WordItem(stem));
-                                    }
-                                    langWeakAndItem.addItem(compositeStemsItem);
-                                } else {
-                                    if (!wordStems.get(0).isBlank()) {
-                                        TermItem stemItem = new WordItem(wordStems.get(0));
-                                        langWeakAndItem.addItem(stemItem);
-                                    }
-                                }
-                            });
-                            languageAndItem.addItem(langWeakAndItem);
-                            languageAndItem.addItem(new RegExpItem(Constants.LANGUAGE_FIELD, true, language));
-                            languageOrItem.addItem(languageAndItem);
-                        }
-                    });
+                phraseItemIndices.add(i);
+                phraseWords.add(words);
+                translationRequests.add(new TranslationRequest(words, detectedLanguage.languageCode(), null));
+            }
+        }
+
+        List<MultiTranslation> batchTranslations = translatePhrases(translationRequests, query);
+
+        for (int phrase = 0; phrase < batchTranslations.size(); phrase++) {
+            int i = phraseItemIndices.get(phrase);
+            List<String> words = phraseWords.get(phrase);
+            MultiTranslation multiTranslation = batchTranslations.get(phrase);
+            if (multiTranslation == null) {
+                // the query item of an untranslated phrase stays as it is
+                continue;
+            }
+            multiTranslationList.add(multiTranslation);
+            query.trace("Translator result: " + gson.toJson(multiTranslation), true, 2);
 
-                    if (filterLanguage.equals("")) {
-                        // no filter so we can add language filters appropriately
-                        languageOrItem.addItem(getLanguageElse(multiTranslation, words));
+            // Normalize and stem all translated terms with the language-specific stemmer
+            Map<String, List<StemList>> stems = new HashMap<>();
+            for (MultiTranslationPart translationPart : multiTranslation.getTranslations()) {
+                List<StemList> stemListList = new ArrayList<>();
+                for (String word : translationPart.getContent()) {
+                    word = linguistics.getNormalizer().normalize(word);
+                    if (word.equals("")) {
+                        stemListList.add(new StemList(word));
+                    } else {
+                        stemListList.addAll(linguistics.getStemmer()
+                                .stem(word, StemMode.DEFAULT, Language.fromLanguageTag(translationPart.getLanguageCode()))
+                        );
                     }
-                    weakAndItem.addItem(languageOrItem);
-
-                    // Extend weakAnd clause with phrases found in query text and their respective synonyms
-                    for (Synonyms synonyms : multiTranslation.getSynonyms()) {
-                        var mainTermStems = getBestStems(detections, synonyms.getMainTerm(), Language.ENGLISH);
-                        EquivItem equivalentSynonyms;
-                        if (mainTermStems.length > 1) {
-                            equivalentSynonyms = new EquivItem(new PhraseItem(mainTermStems));
-                        } else {
-                            equivalentSynonyms = new EquivItem(new WordItem(mainTermStems[0]));
-                        }
+                }
+                stems.put(translationPart.getLanguageCode(), stemListList);
+            }
+            query.trace("Stemmed translations: " + gson.toJson(stems), false, 2);
+
+//            RankItem rankItem = new RankItem();
+            WeakAndItem weakAndItem = new WeakAndItem();
+            OrItem languageOrItem = new OrItem();
+            //Extend query with clauses, which equally rank translated terms to their original counterparts
 
-                        for (String term : synonyms.getTerms()) {
-                            var termList = getBestStems(detections, term, null);
-                            if (termList.length == 0) {
-                                equivalentSynonyms.addItem(new WordItem(term));
-                            } else if (termList.length > 1) {
-                                equivalentSynonyms.addItem(new PhraseItem(termList));
-                            } else {
-                                equivalentSynonyms.addItem(new WordItem(termList[0]));
+            String finalFilterLanguage = filterLanguage;
+            stems.forEach((language, stemLists) -> {
+                if (finalFilterLanguage.equals("") || finalFilterLanguage.equals(language)) {
+                    AndItem languageAndItem = new AndItem();
+                    WeakAndItem langWeakAndItem = new WeakAndItem();
+                    stemLists.forEach(wordStems -> {
+                        if (wordStems.size() > 1) {
+                            PhraseItem compositeStemsItem = new PhraseItem();
+                            for (String stem : wordStems) {
+                                compositeStemsItem.addItem(new WordItem(stem));
+                            }
+                            langWeakAndItem.addItem(compositeStemsItem);
+                        } else {
+                            if (!wordStems.get(0).isBlank()) {
+                                TermItem stemItem = new WordItem(wordStems.get(0));
+                                langWeakAndItem.addItem(stemItem);
                             }
                         }
-                        weakAndItem.addItem(equivalentSynonyms);
-                    }
+                    });
+                    languageAndItem.addItem(langWeakAndItem);
+                    languageAndItem.addItem(new RegExpItem(Constants.LANGUAGE_FIELD, true, language));
+                    languageOrItem.addItem(languageAndItem);
+                }
+            });
 
-//                    if (weakAndItem.getItemCount() > 0) {
-//                        rankItem.addItem(weakAndItem);
-//                    }
+            if (filterLanguage.equals("")) {
+                // no filter so we can add language filters appropriately
+                languageOrItem.addItem(getLanguageElse(multiTranslation, words));
+            }
+            weakAndItem.addItem(languageOrItem);
 
-//                    for (String word : words) {
-//                        rankItem.addItem(new WordItem(word));
-//                    }
+            // Extend weakAnd clause with phrases found in query text and their respective synonyms
+            for (Synonyms synonyms : multiTranslation.getSynonyms()) {
+                var mainTermStems = getBestStems(detections, synonyms.getMainTerm(), Language.ENGLISH);
+                EquivItem equivalentSynonyms;
+                if (mainTermStems.length > 1) {
+                    equivalentSynonyms = new EquivItem(new PhraseItem(mainTermStems));
+                } else {
+                    equivalentSynonyms = new EquivItem(new WordItem(mainTermStems[0]));
+                }
 
-                    if (root instanceof AndItem) {
-                        // assuming multi-part query with subqueries and/or language filter
-                        ((AndItem) root).setItem(i, weakAndItem);
+                for (String term : synonyms.getTerms()) {
+                    var termList = getBestStems(detections, term, null);
+                    if (termList.length == 0) {
+                        equivalentSynonyms.addItem(new WordItem(term));
+                    } else if (termList.length > 1) {
+                        equivalentSynonyms.addItem(new PhraseItem(termList));
                     } else {
-                        // query with single node
-                        root = weakAndItem;
+                        equivalentSynonyms.addItem(new WordItem(termList[0]));
                     }
-                    query.trace(String.format("\n\nSynonym language detections: " + detections), false, 2);
-                    query.trace(String.format("\n\nQuery modification %d/(potentially) %d done", i+1, queryItems.size()), false, 2);
-                } catch (Word2WordTranslator.TranslateExecption translateExecption) {
-                    query.trace("Translator failed: " + translateExecption.getMessage(), 2);
                 }
+                weakAndItem.addItem(equivalentSynonyms);
+            }
+
+//            if (weakAndItem.getItemCount() > 0) {
+//                rankItem.addItem(weakAndItem);
+//            }
+
+//            for (String word : words) {
+//                rankItem.addItem(new WordItem(word));
+//            }
+
+            if (root instanceof AndItem) {
+                // assuming multi-part query with subqueries and/or language filter
+                ((AndItem) root).setItem(i, weakAndItem);
+            } else {
+                // query with single node
+                root = weakAndItem;
             }
+            query.trace(String.format("\n\nSynonym language detections: " + detections), false, 2);
+            query.trace(String.format("\n\nQuery modification %d/(potentially) %d done", i+1, queryItems.size()), false, 2);
         }
         // Store translation metadata in query context. This property can then be retrieved from custom result renderer.
         query.getContext(true).setProperty(Constants.TRANSLATIONS, gson.toJson(multiTranslationList));
@@ -214,6 +227,38 @@ public class MultilangSearcher extends Searcher {
         return execution.search(query);
     }
 
+    /**
+     * Translates all phrases in a single batch request. If the batch request fails (e.g. a translation container
+     * without the batch endpoint), every phrase is translated on its own, so a failure only affects its phrase.
+     * @param translationRequests Translation requests of the phrases
+     * @param query Query to trace translation failures to
+     * @return Translations in request order, null for phrases which could not be translated
+     */
+    List<MultiTranslation> translatePhrases(List<TranslationRequest> translationRequests, Query query) {
+        if (translationRequests.isEmpty()) {
+            return new ArrayList<>();
+        }
+        try {
+            // Launch one translation request for all phrases to the word2word translation container
+            return translator.multiTranslateBatch(translationRequests);
+        } catch (Word2WordTranslator.TranslateExecption translateExecption) {
+            query.trace("Batch translator failed, translating phrases one by one: "
+                    + translateExecption.getMessage(), 2);
+        }
+        List<MultiTranslation> translations = new ArrayList<>();
+        for (TranslationRequest translationRequest : translationRequests) {
+            MultiTranslation multiTranslation = null;
+            try {
+                multiTranslation = translator.multiTranslate(translationRequest.getContent(),
+                        translationRequest.getSourceLanguage());
+            } catch (Word2WordTranslator.TranslateExecption translateExecption) {
+                query.trace("Translator failed: " + translateExecption.getMessage(), 2);
+            }
+            translations.add(multiTranslation);
+        }
+        return translations;
+    }
+
     private Item getLanguageElse(MultiTranslation multiTranslation, List<String> words) {
         NotItem notItem = new NotItem();
         String regExp = multiTranslation.getLanguages()
@@ -0,0 +1,10 @@
+package baseline.model;
+
+import lombok.Getter;
+
+import java.util.List;
+
+@Getter
+public class BatchMultiTranslation {
+    private List<MultiTranslation> results;
+}
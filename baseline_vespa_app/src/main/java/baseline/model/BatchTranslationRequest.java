@@ -0,0 +1,11 @@
+package baseline.model;
+
+import java.util.List;
+
+public class BatchTranslationRequest {
+    List<TranslationRequest> queries;
+
+    public BatchTranslationRequest(List<TranslationRequest> queries) {
+        this.queries = queries;
+    }
+}
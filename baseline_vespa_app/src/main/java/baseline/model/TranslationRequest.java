@@ -1,7 +1,10 @@
 package baseline.model;
 
+import lombok.Getter;
+
 import java.util.List;
 
+@Getter
 public class TranslationRequest {
     List<String> content;
     String sourceLanguage;
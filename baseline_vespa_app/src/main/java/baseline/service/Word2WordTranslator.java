@@ -1,5 +1,7 @@
 package baseline.service;
 
+import baseline.model.BatchMultiTranslation;
+import baseline.model.BatchTranslationRequest;
 import baseline.model.MultiTranslation;
 import baseline.model.Translation;
 import baseline.model.TranslationRequest;
@@ -66,6 +68,30 @@ public class Word2WordTranslator {
         }
     }
 
+    /**
+     * Translates multiple tokenized passages from their source language to all supported languages in one request
+     * @param requests Translation requests containing the tokens and source language code of each passage
+     * @return Objects containing all supported languages and according translations, in request order
+     * @throws TranslateExecption If something went wrong during translation
+     */
+    public List<MultiTranslation> multiTranslateBatch(List<TranslationRequest> requests)
+            throws TranslateExecption{
+        Call<BatchMultiTranslation> translationCall = word2wordService.multiTranslateBatch(
+                new BatchTranslationRequest(requests));
+        try {
+            Response<BatchMultiTranslation> translationResponse = translationCall.execute();
+            if (translationResponse.isSuccessful() && translationResponse.body() != null
+                    && translationResponse.body().getResults() != null
+                    && translationResponse.body().getResults().size() == requests.size()) {
+                return translationResponse.body().getResults();
+            } else {
+                throw new TranslateExecption(translationResponse.message());
+            }
+        } catch (IOException e) {
+            throw new TranslateExecption(e.getMessage());
+        }
+    }
+
     /**
      * Gets thrown upon translation failure
      */
@@ -1,5 +1,7 @@
 package baseline.service.retrofit;
 
+import baseline.model.BatchMultiTranslation;
+import baseline.model.BatchTranslationRequest;
 import baseline.model.MultiTranslation;
 import baseline.model.Translation;
 import baseline.model.TranslationRequest;
@@ -14,4 +16,7 @@ public interface Word2wordService {
 
     @POST("multilang-translate")
     Call<MultiTranslation> multiTranslate(@Body TranslationRequest request);
+
+    @POST("multilang-translate/batch")
+    Call<BatchMultiTranslation> multiTranslateBatch(@Body BatchTranslationRequest request);
 }
@@ -1,7 +1,9 @@
 // Copyright 2019 Oath Inc. Licensed under the terms of the Apache 2.0 license. See LICENSE in the project root.
 package baseline;
 
+import baseline.model.MultiTranslation;
 import baseline.model.StemFilter;
+import baseline.model.TranslationRequest;
 import baseline.service.Word2WordTranslator;
 import com.google.gson.Gson;
 import com.yahoo.application.Application;
@@ -44,6 +46,8 @@ import java.util.List;
 import static java.net.URLEncoder.encode;
 import static org.junit.Assert.assertNotNull;
 import static org.junit.jupiter.api.Assertions.assertEquals;
+import static org.junit.jupiter.api.Assertions.assertNull;
+import static org.junit.jupiter.api.Assertions.assertSame;
 import static org.junit.jupiter.api.Assertions.assertTrue;
 
 
@@ -109,6 +113,36 @@ class MultilangSearcherTest {
         }
     }
 
+    @Test
+    void testBatchTranslationFallback() {
+        MultiTranslation warTranslation = new MultiTranslation();
+        Word2WordTranslator translator = new Word2WordTranslator() {
+            @Override
+            public List<MultiTranslation> multiTranslateBatch(List<TranslationRequest> requests)
+                    throws TranslateExecption {
+                throw new TranslateExecption("Not Found");
+            }
+
+            @Override
+            public MultiTranslation multiTranslate(List<String> tokens, String sourceLanguageCode)
+                    throws TranslateExecption {
+                if (tokens.contains("mission")) {
+                    throw new TranslateExecption("Internal Server Error");
+                }
+                return warTranslation;
+            }
+        };
+        MultilangSearcher searcher = new MultilangSearcher(new OpenNlpLinguistics(), translator);
+        List<MultiTranslation> translations = searcher.translatePhrases(Arrays.asList(
+                new TranslationRequest(List.of("war"), "en", null),
+                new TranslationRequest(List.of("mission"), "en", null)), multilangQuery);
+
+        // the batch failure falls back to one request per phrase, only the failing phrase stays untranslated
+        assertEquals(2, translations.size());
+        assertSame(warTranslation, translations.get(0));
+        assertNull(translations.get(1));
+    }
+
     @Test
     void testStemmer() {
         Linguistics linguistics = new OpenNlpLinguistics();
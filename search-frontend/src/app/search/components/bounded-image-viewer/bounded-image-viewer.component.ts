@@ -52,7 +52,8 @@ export class BoundedImageViewerComponent implements AfterViewInit, OnChanges {
 
   protected initBoxContent(): void {
     const boxObservable =
-    this.vespaService.buildBoundingBoxContent(this.language, this.boundingData, this.metaData, this.stemFilters);
+    this.vespaService.buildBoundingBoxContent(
+      this.language, this.boundingData, this.metaData, this.stemFilters, undefined, this.docName, this.docPage);
     boxObservable.subscribe(
       boxResponse => {
         this.boundingBoxContent = boxResponse.content;
@@ -15,7 +15,8 @@ export class BoundedSnippetViewerComponent extends BoundedImageViewerComponent i
 
   protected initBoxContent(): void {
     const boxObservable =
-    this.vespaService.buildBoundingBoxContent(this.language, this.boundingData, this.metaData, this.stemFilters, this.snippetBox);
+    this.vespaService.buildBoundingBoxContent(
+      this.language, this.boundingData, this.metaData, this.stemFilters, this.snippetBox, this.docName, this.docPage);
     boxObservable.subscribe(
       boxResponse => {
         this.boundingBoxContent = boxResponse.content;
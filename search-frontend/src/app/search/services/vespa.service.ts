@@ -55,14 +55,18 @@ export class VespaService {
   }
 
   buildBoundingBoxContent(
-    language: string, boundingData: any, metaData: QueryMetadata, stemFilters: string[], surroundingBox?: any
+    language: string, boundingData: any, metaData: QueryMetadata, stemFilters: string[], surroundingBox?: any,
+    docName?: string, page?: number
   ): Observable<any> {
+    // document and page let the api use its cached box index of the page
     return this.http.post<any>(this.URL + 'bounding-boxes/', {
       language,
       'bounding-data': boundingData,
       'meta-data': metaData,
       'surrounding-box': surroundingBox,
-      'stem-filters': stemFilters
+      'stem-filters': stemFilters,
+      document: docName,
+      page
     });
   }
 
@@ -0,0 +1,195 @@
+import os
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+import bounding_boxes
+import cache_util
+import config
+import image_processing
+import metadata as page_metadata
+import stemmer
+import synonym_util
+import vespa_util
+
+# request handling shared by the Flask (app.py) and asyncio (async_app.py) servers, independent of the framework
+templates = Environment(loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')),
+                        autoescape=select_autoescape(['html']))
+
+
+prefetch_modes = ['results', 'snippets']
+
+
+class InvalidRequestException(Exception):
+    pass
+
+
+def search_args(args):
+    """
+    :param args: query string arguments of a /search/ request
+    :return: keyword arguments of vespa_util.query
+    """
+    return {
+        'query': args.get('query', default='', type=str),
+        'page': args.get('page', 0, type=int),
+        'hits': args.get('hits', 5, type=int),
+        'language': args.get('language', default='', type=str),
+        'document': args.get('document', default=None),
+        'order_by': args.get('order_by', default=''),
+        'direction': args.get('direction', default='desc'),
+        'stem_filter': args.get('stem_filter', default=''),
+        'lean': args.get('bounding_data', default='full') == 'lean',
+        'prefetch': args.get('prefetch') if args.get('prefetch') in prefetch_modes else ''
+    }
+
+
+def search_response(hits, query_metadata, bounding_data, total):
+    return {
+        "hits": hits,
+        "queryMetadata": query_metadata,
+        "boundingBoxes": bounding_data,
+        "total": total
+    }
+
+
+def snippet_args(data):
+    """
+    :param data: JSON payload of a /snippets/ request
+    :return: positional arguments of vespa_util.build_query_snippets
+    :raises InvalidRequestException: if the inline snippet options are invalid
+    """
+    data['stems'] = vespa_util.snippet_stems(data['stems'], data['hit']['fields']['language'], data['stem-filters'])
+    data['synonyms'] = stem_filter_synonyms(data['synonyms'], data['stem-filters'])
+
+    inline_encoding = None
+    if data.get('inline', False):
+        image_format = str(data.get('format', config.convert_type)).upper()
+        quality = data.get('quality', config.snippet_inline_quality)
+        if image_format not in image_processing.inline_formats or not isinstance(quality, int) \
+                or not 1 <= quality <= 95:
+            raise InvalidRequestException(f'invalid inline snippet format {image_format} or quality {quality}')
+        inline_encoding = (image_format, quality)
+
+    return data['hit'], data['stems'], data['synonyms'], inline_encoding
+
+
+def bounding_box_html(data):
+    """
+    Render the bounding box containers of a page or snippet for the Angular frontend
+
+    :param data: JSON payload of a /bounding-boxes/ request
+    :return: response dict with the rendered HTML content
+    :raises InvalidRequestException: if the document or page of the request are invalid
+    """
+    bounding_data = data['bounding-data']
+    boxes = bounding_data['boxes']
+    stem_parts = None
+    page = request_page(data)
+    if page is not None:
+        try:
+            # the stem part index of the page is cached instead of being rebuilt from the posted stems
+            stem_parts = page_metadata.load_stem_parts(*page)
+            if not bounding_data.get('lean', False):
+                # full page data: the cached index of the page replaces the posted boxes, so neither the page nor a
+                # snippet region gets sorted and region lookups only visit the boxes of the region
+                boxes = page_metadata.load_box_index(*page)
+        except FileNotFoundError:
+            pass
+    dimensions = bounding_data['dimensions']
+    metadata = data['meta-data']
+    translations = metadata['translations']
+    stems = {stem: terms
+             for phrase_translations in translations
+             for stem, terms in phrase_translations['stems'].items()
+             if stem != '' and stem not in data['stem-filters']
+             and (data['language'] in terms['languages']
+                  or data['language'] not in phrase_translations['languages'])
+             }
+    synonyms = [synonym for phrase_translations in translations for synonym in phrase_translations['synonyms']]
+    synonyms = stem_filter_synonyms(synonyms, data['stem-filters'])
+    terms = vespa_util.get_relevant_terms(stems, bounding_data['stems'], stem_parts)
+    if 'surrounding-box' in data.keys():
+        flat_relative_boxes = bounding_boxes \
+            .flatten_snippet_bounding_boxes(boxes, data['surrounding-box'])
+        width = data['surrounding-box'][1] - data['surrounding-box'][0]
+        height = data['surrounding-box'][3] - data['surrounding-box'][2]
+    else:
+        flat_relative_boxes = bounding_boxes \
+            .flatten_bounding_boxes(boxes, dimensions['origWidth'], dimensions['origHeight'])
+        width = dimensions['origWidth']
+        height = dimensions['origHeight']
+    synonym_positions = vespa_util.find_relevant_synonym_positions([box['word'] for box in flat_relative_boxes],
+                                                                   synonyms, bounding_data['stems'])
+    mainterm_map = {synonym: item['mainTerm']
+                    for phrase_translations in translations
+                    for item in phrase_translations['synonyms']
+                    for synonym in synonym_util.process_synonyms([item['terms']])}
+    stem_map = {term: stems for phrase_translations in translations for term, stems in
+                phrase_translations['stemMap'].items()}
+    return {
+        'content': templates.get_template('bounding_boxes.html').render(
+            boxes=flat_relative_boxes,
+            terms=terms,
+            stem_map=stem_map,
+            stems=stems,
+            synonym_positions=synonym_positions,
+            mainterm_map=mainterm_map,
+            width=width,
+            height=height,
+            get_word_title=get_word_title)
+    }
+
+
+def request_page(data):
+    """
+    :param data: JSON payload of a /bounding-boxes/ request
+    :return: (document, page) the bounding data belongs to, None if the request does not name them
+    :raises InvalidRequestException: if the document name is no plain file name or the page no number
+    """
+    doc, page = data.get('document'), data.get('page')
+    if doc is None or page is None:
+        return None
+    if not isinstance(doc, str) or '/' in doc or doc.startswith('.'):
+        raise InvalidRequestException(f'invalid document {doc}')
+    try:
+        return doc, int(page)
+    except (TypeError, ValueError):
+        raise InvalidRequestException(f'invalid page {page}')
+
+
+def get_word_title(word, stems, terms, synonyms, mainterm_map):
+    title = word
+    if word in terms:
+        stem = terms[word]
+        languages = [stemmer.languages[language].capitalize()
+                     for language in stems[stem]['languages'] if language != 'un']
+        return title + f" | stemmed and normalized base form: '{stem}' " \
+                       f"({' | '.join(languages)})"
+    elif synonyms:
+        synonym_title = ''
+        for i, synonym in enumerate(synonyms):
+            try:
+                synonym_title += f"'{synonym}' synonym for '{mainterm_map[synonym]}'"
+            except KeyError:
+                if word == synonym:
+                    synonym_title += f"'{synonym}' (main synonym term)"
+            if i < len(synonyms) - 1:
+                synonym_title += ' | '
+        return synonym_title
+    else:
+        return title
+
+
+def stem_filter_synonyms(synonyms, stem_filters):
+    filtered_synonyms = []
+    for synonym in synonyms:
+        mainTerm = synonym['mainTerm'] if synonym['mainTerm'] not in stem_filters else ''
+        terms = [term for term in synonym['terms'] if term not in stem_filters]
+        filtered_synonyms.append({'mainTerm': mainTerm, 'terms': terms})
+    return filtered_synonyms
+
+
+def stats():
+    stats = cache_util.stats()
+    stats['vespaCircuitBreaker'] = vespa_util.client.breaker.stats()
+    stats['prefetcher'] = vespa_util.prefetcher.stats()
+    return stats
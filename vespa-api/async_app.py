@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, request, abort, send_from_directory, flash, redirect, make_response
+from werkzeug.utils import secure_filename
+
+import api_handlers
+import config
+import vespa_client
+import vespa_util
+
+# asyncio variant of app.py with the same routes and JSON contract (run with: hypercorn async_app:app).
+# Vespa requests are awaited, so a single worker serves many requests while they wait on the index;
+# CPU and disk bound steps (result processing, metadata loading, snippet cropping, template rendering)
+# run in a bounded thread pool, so they never block the event loop.
+app = Quart(__name__)
+ALLOWED_EXTENSIONS = ['pdf']
+executor = None
+client = None
+
+
+@app.before_serving
+async def startup():
+    global executor, client
+    executor = ThreadPoolExecutor(max_workers=config.async_executor_workers, thread_name_prefix='api')
+    # shares the circuit breaker of the synchronous client, so /cache-stats reports its state
+    client = vespa_client.AsyncVespaClient(vespa_util.url, vespa_util.port, breaker=vespa_util.client.breaker)
+
+
+@app.after_serving
+async def shutdown():
+    await client.close()
+    executor.shutdown(wait=False)
+
+
+@app.after_request
+async def allow_cross_origin(response):
+    # equivalent of flask_cors' defaults in app.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Methods'] = 'GET, HEAD, POST, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = \
+            request.headers.get('Access-Control-Request-Headers', 'Content-Type')
+    return response
+
+
+async def __run(func, *args, **kwargs):
+    """
+    Run a blocking function in the executor
+    """
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+@app.route('/')
+async def hello_world():
+    return 'Hello World!'
+
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+@app.route('/upload', methods=['POST'])
+async def upload_file():
+    files = await request.files
+    # check if the post request has the file part
+    if 'file' not in files:
+        await flash('No file part')
+        return redirect(request.url)
+    file = files['file']
+    # If the user does not select a file, the browser submits an
+    # empty file without a filename.
+    if file.filename == '':
+        await flash('No selected file')
+        return redirect(request.url)
+    if file and allowed_file(file.filename):
+        filename = secure_filename(file.filename)
+        await file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        return ''
+
+
+@app.route('/search/', methods=['GET'])
+async def search():
+    try:
+        # the vespa request is awaited, cache lookup, result processing and prefetching are shared with app.py
+        cached_search = await __run(vespa_util.CachedSearch, **api_handlers.search_args(request.args))
+        if cached_search.result is None:
+            await __run(cached_search.process, await client.query(body=cached_search.body))
+    except (vespa_client.VespaClientException, vespa_util.VespaTimeoutException):
+        abort(504)
+    hits, query_metadata, bounding_boxes, total = await __run(cached_search.finish)
+
+    return api_handlers.search_response(hits, query_metadata, bounding_boxes, total)
+
+
+@app.route('/snippets/', methods=['POST'])
+async def build_snippets():
+    try:
+        snippet_args = api_handlers.snippet_args(await request.get_json())
+    except api_handlers.InvalidRequestException:
+        abort(400)
+
+    return await __run(vespa_util.build_query_snippets, *snippet_args)
+
+
+@app.route('/snippet/<snippet_id>')
+async def show_snippet(snippet_id):
+    return await send_from_directory(config.snippet_dir, snippet_id + config.convert_suffix)
+
+
+@app.route('/bounding-boxes/', methods=['POST'])
+async def build_bounding_box_html():
+    try:
+        return await __run(api_handlers.bounding_box_html, await request.get_json())
+    except api_handlers.InvalidRequestException:
+        abort(400)
+
+
+@app.route('/status')
+async def status():
+    return 'Up and running!'
+
+
+@app.route('/cache-stats')
+async def cache_stats():
+    return api_handlers.stats()
+
+
+@app.route('/document/<doc_name>/page/<page_number>')
+async def get_page_data(doc_name, page_number):
+    try:
+        etag = await __run(vespa_util.page_etag, doc_name, page_number)
+        if etag in request.if_none_match:
+            # page unchanged since the client fetched it - skip the index query and metadata loading
+            response = await make_response('', 304)
+        else:
+            # load the metadata while waiting for the index
+            bounding_data, result = await asyncio.gather(
+                __run(vespa_util.page_data, doc_name, page_number),
+                client.query(body=vespa_util.doc_page_query_body(doc_name, page_number)))
+            response = await make_response({
+                'item': result.hits[0],
+                'boundingData': bounding_data
+            })
+        response.set_etag(etag)
+        return response
+    except (FileNotFoundError, IndexError):
+        return '', 204
+    except vespa_client.VespaClientException:
+        abort(504)
+
+
+@app.route('/document/<doc_name>/page/<page_number>/image')
+async def show_document_page_image(doc_name, page_number):
+    return await send_from_directory(config.metadata_path, doc_name + '/' + page_number + config.convert_suffix)
+
+
+@app.route('/document/<doc_name>/download')
+async def download_document_file(doc_name):
+    return await send_from_directory(config.metadata_path, doc_name + '.pdf', as_attachment=True)
+
+
+if __name__ == '__main__':
+    app.run()
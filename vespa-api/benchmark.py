@@ -0,0 +1,798 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+
+from PIL import Image, ImageDraw
+
+
+def benchmark_raster(args):
+    """
+    Compare per-page rasterization (one poppler call per page) with chunked per-document rasterization
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    from rasterizer import PageRasterizer
+
+    with TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf or __build_fixture_pdf(f'{tmp_dir}/fixture.pdf', args.pages)
+        page_count = pdfinfo_from_path(pdf_path)['Pages']
+        print(f'Rasterizing {page_count} pages of {pdf_path}')
+
+        start = time.perf_counter()
+        for page_no in range(page_count):
+            convert_from_path(pdf_path, first_page=page_no + 1, last_page=page_no + 1)[0].close()
+        per_page = time.perf_counter() - start
+        __report('per page', per_page, page_count)
+
+        for chunk_size in args.chunk_sizes:
+            start = time.perf_counter()
+            with PageRasterizer(pdf_path, chunk_size=chunk_size) as rasterizer:
+                for page_no in range(page_count):
+                    rasterizer.page(page_no)
+            chunked = time.perf_counter() - start
+            __report(f'chunks of {chunk_size}', chunked, page_count, per_page)
+
+
+def benchmark_feed(args):
+    """
+    Feed generated page documents to a local stub of the vespa document API, sequentially and with the batch feeder
+    """
+    from feeder import BatchFeeder
+
+    server = __start_stub_server(__feed_stub_handler(args.latency, args.error_rate))
+    url, port = 'http://127.0.0.1', server.server_address[1]
+    documents = [(f'benchmark_{i}', {'parent_doc': 'benchmark', 'page': i, 'body': f'page {i} ' * 200})
+                 for i in range(args.documents)]
+
+    with TemporaryDirectory() as tmp_dir:
+        with BatchFeeder(url=url, port=port, max_in_flight=1, batch_size=1, backoff=0.01,
+                         dead_letter_path=f'{tmp_dir}/sequential.jsonl',
+                         generation_path=f'{tmp_dir}/index_generation') as sequential:
+            for data_id, fields in documents:
+                sequential.add(data_id, fields)
+        print(f'{"sequential":>20}: {sequential.stats.report()}')
+
+        for max_in_flight in args.in_flight:
+            with BatchFeeder(url=url, port=port, max_in_flight=max_in_flight, backoff=0.01,
+                             dead_letter_path=f'{tmp_dir}/batched.jsonl',
+                             generation_path=f'{tmp_dir}/index_generation') as batched:
+                for data_id, fields in documents:
+                    batched.add(data_id, fields)
+            print(f'{f"{max_in_flight} in flight":>20}: {batched.stats.report()}')
+    server.shutdown()
+
+
+def __feed_stub_handler(latency, error_rate):
+    class FeedStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            status = 503 if random.random() < error_rate else 200
+            body = json.dumps({'pathId': self.path}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FeedStubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def __start_stub_server(handler):
+    server = StubServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_metadata(args):
+    """
+    Compare load time and memory of JSON and binary page metadata files on generated dense pages
+    """
+    import resource
+    import binary_metadata
+
+    page_data = build_dense_page(args.words)
+    with TemporaryDirectory() as tmp_dir:
+        json_paths, binary_paths = [], []
+        for page in range(args.pages):
+            json_paths.append(f'{tmp_dir}/{page}.json')
+            binary_paths.append(f'{tmp_dir}/{page}{binary_metadata.suffix}')
+            with open(json_paths[-1], 'w') as file:
+                json.dump(page_data, file)
+            binary_metadata.write(binary_paths[-1], page_data)
+        print(f'{args.pages} pages with {args.words} words | JSON: {os.path.getsize(json_paths[0]) / 1024:.0f}KiB, '
+              f'binary: {os.path.getsize(binary_paths[0]) / 1024:.0f}KiB per page')
+        lookup_words = list(page_data['boxes'].keys())[:5]
+
+        def load_json(path):
+            with open(path, 'r') as file:
+                return json.load(file)
+
+        for label, paths, load in [('json', json_paths, load_json),
+                                   ('binary', binary_paths, binary_metadata.BinaryPageMetadata)]:
+            rss_before = __rss()
+            start = time.perf_counter()
+            pages = []
+            for path in paths:
+                page = load(path)
+                # typical snippet request: a handful of term lookups and the page dimensions
+                [page['boxes'][word] for word in lookup_words]
+                page['dimensions']['thumbScale']
+                pages.append(page)
+            duration = time.perf_counter() - start
+            __report(f'{label} load', duration, len(paths))
+            print(f'{"":>20}  RSS growth while holding all pages: {(__rss() - rss_before) / 1024 / 1024:.1f}MiB')
+            del pages
+
+
+def benchmark_search_payload(args):
+    """
+    Compare size and build time of full and lean /search/ bounding box data for generated dense pages
+    """
+    import config
+    import metadata
+
+    page_data = build_dense_page(args.words)
+    query_stems = list(page_data['stems'].keys())[:3]
+    with TemporaryDirectory() as tmp_dir:
+        config.metadata_path = tmp_dir
+        os.mkdir(f'{tmp_dir}/benchmark')
+        hits = []
+        for page in range(args.hits):
+            metadata.write('benchmark', page, page_data)
+            hits.append({'fields': {'parent_doc': 'benchmark', 'page': page}})
+
+        import vespa_util
+        for label, stems in [('full', None), ('lean', query_stems)]:
+            durations = []
+            payload = b''
+            for _ in range(args.repetitions):
+                start = time.perf_counter()
+                payload = json.dumps(vespa_util.get_bounding_box_data(hits, query_stems=stems)).encode()
+                durations.append(time.perf_counter() - start)
+            durations.sort()
+            p95 = durations[min(len(durations) - 1, round(0.95 * (len(durations) - 1)))]
+            print(f'{label:>20}: payload {len(payload) / 1024:9.1f}KiB | build + serialize p50: '
+                  f'{1000 * durations[len(durations) // 2]:.1f}ms, p95: {1000 * p95:.1f}ms')
+
+
+def benchmark_hit_metadata(args):
+    """
+    Compare sequential and concurrent metadata loading of search hits with a simulated storage latency per file
+    """
+    import config
+    import metadata
+
+    page_data = build_dense_page(args.words)
+    with TemporaryDirectory() as tmp_dir:
+        config.metadata_path = tmp_dir
+        os.mkdir(f'{tmp_dir}/benchmark')
+        for page in range(max(args.hits)):
+            metadata.write('benchmark', page, page_data)
+
+        import vespa_util
+        load = metadata.load
+
+        def slow_load(doc, page):
+            # e.g. a stat and read round trip to network storage
+            time.sleep(args.latency)
+            return load(doc, page)
+
+        metadata.load = slow_load
+        for hit_count in args.hits:
+            hits = [{'fields': {'parent_doc': 'benchmark', 'page': page}} for page in range(hit_count)]
+            start = time.perf_counter()
+            for _ in range(args.repetitions):
+                # previous approach: one page after another
+                for hit in hits:
+                    metadata.as_dict(metadata.load(hit['fields']['parent_doc'], hit['fields']['page']))
+            sequential = time.perf_counter() - start
+            __report(f'{hit_count} hits sequential', sequential, args.repetitions)
+            start = time.perf_counter()
+            for _ in range(args.repetitions):
+                vespa_util.get_bounding_box_data(hits)
+            __report(f'{hit_count} hits concurrent', time.perf_counter() - start, args.repetitions, sequential)
+        metadata.load = load
+
+
+def benchmark_tiles(args):
+    """
+    Compare snippet crops from fully decoded page thumbnails with crops from page tile containers
+    """
+    import page_tiles
+
+    generator = random.Random(42)
+    thumb = Image.new('RGB', (args.width, args.height), 'white')
+    draw = ImageDraw.Draw(thumb)
+    for line in range(0, args.height, 24):
+        draw.text((40, line), ' '.join('lorem ipsum dolor sit amet' for _ in range(args.width // 160)), fill='black')
+    snippet_height = round(0.06 * args.height)
+    boxes = [(0, y, args.width, y + snippet_height)
+             for y in (generator.randrange(args.height - snippet_height) for _ in range(args.snippets))]
+
+    with TemporaryDirectory() as tmp_dir:
+        thumb_path = f'{tmp_dir}/0_thumb.jpg'
+        tiles_path = f'{tmp_dir}/0{page_tiles.suffix}'
+        thumb.save(thumb_path, 'JPEG')
+        page_tiles.write(tiles_path, thumb)
+        print(f'{args.width}x{args.height} page with {args.snippets} snippets per request | '
+              f'thumbnail: {os.path.getsize(thumb_path) / 1024:.0f}KiB, '
+              f'tiles: {os.path.getsize(tiles_path) / 1024:.0f}KiB')
+
+        baseline = None
+        for label, open_image in [('full decode', Image.open), ('tiles', page_tiles.TiledImage)]:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                page_image = open_image(thumb_path if label == 'full decode' else tiles_path)
+                for box in boxes:
+                    page_image.crop(box).close()
+                page_image.close()
+            duration = time.perf_counter() - start
+            __report(label, duration, args.requests, baseline)
+            baseline = baseline or duration
+        # decoded pixel buffers are the dominating allocations of a snippet request
+        print(f'{"":>20}  decoded pixels per request - full decode: {args.width * args.height / 1e6:.1f}MP, '
+              f'tiles: at most {args.snippets * (snippet_height + 2 * 128) * args.width / 1e6:.1f}MP')
+
+
+def benchmark_synonyms(args):
+    """
+    Compare per-synonym list scans with the single-pass synonym matcher and verify that both find the same positions
+    """
+    from synonym_util import SynonymMatcher
+
+    generator = random.Random(42)
+    vocabulary = [''.join(generator.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(generator.randint(2, 10)))
+                  for _ in range(max(1, args.words // 5))]
+    words = [generator.choice(vocabulary) for _ in range(args.words)]
+    synonyms = []
+    for _ in range(args.synonyms):
+        if generator.random() < 0.5:
+            # phrase taken from the page, so there are matches to locate
+            start = generator.randrange(args.words - 3)
+            synonyms.append(' '.join(words[start:start + generator.randint(1, 3)]))
+        else:
+            synonyms.append(' '.join(generator.choice(vocabulary) for _ in range(generator.randint(1, 3))))
+    print(f'{args.words} page words, {len(synonyms)} synonyms')
+
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        scanned = {}
+        for synonym in synonyms:
+            for position in __scan_synonym(synonym, words):
+                scanned.setdefault(position, set()).add(synonym)
+    scan = time.perf_counter() - start
+    __report('list scans', scan, args.repetitions)
+
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        matcher = SynonymMatcher()
+        for synonym in synonyms:
+            matcher.add(synonym)
+        matched = matcher.locate(words)
+    __report('matcher', time.perf_counter() - start, args.repetitions, scan)
+
+    assert {position: set(values) for position, values in matched.items()} == scanned, \
+        'matcher and list scans found different synonym positions'
+    print(f'{"":>20}  both found {len(matched)} synonym word positions')
+
+
+def __scan_synonym(synonym, words):
+    # previous approach: look up the first synonym word with list.index and compare slices, one synonym at a time
+    synonym_words = synonym.split(' ')
+    locations = set()
+    index = -1
+    while True:
+        try:
+            index = words.index(synonym_words[0], index + 1)
+        except ValueError:
+            return locations
+        if synonym_words == words[index:index + len(synonym_words)]:
+            locations.update(range(index, index + len(synonym_words)))
+
+
+def benchmark_stemming(args):
+    """
+    Compare a new stemmer per call (previous approach) with shared stemmers and cached bulk stemming
+    on the vocabulary of a page, as stemmed during import and for every translated query phrase
+    """
+    from nltk.stem.snowball import SnowballStemmer
+    import stemmer
+
+    if args.page:
+        import metadata
+        doc_dir, file = os.path.split(os.path.abspath(args.page))
+        metadata.config.metadata_path, doc = os.path.split(doc_dir)
+        words = list(metadata.load(doc, int(file.split('.')[0]))['boxes'].keys())
+    else:
+        words = list(build_dense_page(args.words)['boxes'].keys())
+    print(f'{len(words)} unique page words, {args.repetitions} repetitions')
+
+    def stem_per_call(page_words, language_code):
+        page_stemmer = SnowballStemmer(language=stemmer.languages[language_code])
+        return {word: page_stemmer.stem(word) for word in page_words}
+
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        previous = stem_per_call(words, args.language)
+    per_call = time.perf_counter() - start
+    __report('stemmer per call', per_call, args.repetitions)
+
+    start = time.perf_counter()
+    cached = stemmer.stem_words(words, args.language)
+    __report('cold cache', time.perf_counter() - start, 1)
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        cached = stemmer.stem_words(words, args.language)
+    __report('warm cache', time.perf_counter() - start, args.repetitions, per_call)
+    assert cached == previous, 'cached stems differ from freshly computed stems'
+
+    # query phrases: a few words stemmed in every supported language
+    phrase = words[:3]
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        for language_code in stemmer.languages:
+            stem_per_call(phrase, language_code)
+    per_call = time.perf_counter() - start
+    __report('phrase per call', per_call, args.repetitions)
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        for language_code in stemmer.languages:
+            stemmer.stem_words(phrase, language_code)
+    __report('phrase cached', time.perf_counter() - start, args.repetitions, per_call)
+
+
+def benchmark_load(args):
+    """
+    Load test the synchronous (app.py) and the asyncio (async_app.py) server with the same number of workers.
+    Both are started as subprocesses against local stubs of the vespa search API and the word2word batch translation
+    API, the multilang searcher's translation request is simulated by the vespa stub.
+    """
+    import metadata
+
+    page_data = build_dense_page(args.words)
+    query_words = list(page_data['stems'].values())[:3]
+    translate_server = __start_stub_server(__translate_stub_handler(args.translate_latency))
+    search_server = __start_stub_server(__search_stub_handler(
+        args.vespa_latency, f'http://127.0.0.1:{translate_server.server_address[1]}/multilang-translate/batch',
+        args.pages, args.hits))
+    if importlib.util.find_spec('gunicorn'):
+        sync_command = [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--bind', '{bind}', 'wsgi:app']
+    else:
+        # stand-in for gunicorn's sync workers: one request at a time per process
+        sync_command = [sys.executable, '-c', f'from werkzeug.serving import run_simple; from app import app; '
+                                              f'host, port = "{{bind}}".split(":"); '
+                                              f'run_simple(host, int(port), app, processes={args.workers})']
+    async_command = [sys.executable, '-m', 'hypercorn', '--workers', str(args.workers), '--bind', '{bind}',
+                     'async_app:app']
+
+    with TemporaryDirectory() as tmp_dir:
+        import config
+        config.metadata_path = tmp_dir
+        os.mkdir(f'{tmp_dir}/benchmark')
+        for page in range(args.pages):
+            metadata.write('benchmark', page, page_data)
+        environment = dict(os.environ, METADATA_PATH=tmp_dir, VESPA_URL='http://127.0.0.1',
+                           VESPA_PORT=str(search_server.server_address[1]))
+        query = json.dumps([words[0] for words in query_words])
+        baseline = None
+        for label, command in [('sync', sync_command), ('async', async_command)]:
+            bind = f'127.0.0.1:{__free_port()}'
+            process = subprocess.Popen([part.replace('{bind}', bind) for part in command], env=environment,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                for _ in range(100):
+                    try:
+                        urllib.request.urlopen(f'http://{bind}/status', timeout=1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                else:
+                    raise RuntimeError(f'{label} server did not start: {" ".join(command)}')
+                # every request asks for another result page, so the result cache of the servers does not apply
+                durations, errors, duration = asyncio.run(__drive_load(
+                    f'http://{bind}/search/',
+                    lambda i: {'query': query, 'hits': args.hits, 'page': i, 'bounding_data': 'lean'},
+                    args.concurrency, args.requests))
+            finally:
+                process.terminate()
+                process.wait()
+            durations.sort()
+            throughput = len(durations) / duration
+            speedup = f' | speedup x{throughput / baseline:.2f}' if baseline else ''
+            p95 = durations[min(len(durations) - 1, round(0.95 * (len(durations) - 1)))]
+            print(f'{label:>20}: {throughput:8.1f} requests/s | p50: {1000 * durations[len(durations) // 2]:.0f}ms, '
+                  f'p95: {1000 * p95:.0f}ms | {errors} errors{speedup}')
+            baseline = baseline or throughput
+    search_server.shutdown()
+    translate_server.shutdown()
+
+
+async def __drive_load(url, params, concurrency, requests):
+    """
+    Send requests to url from concurrent clients, params returns the query parameters of the i-th request
+    :return: durations of successful requests, error count and total duration in seconds
+    """
+    import httpx
+
+    durations = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(client):
+        nonlocal errors
+        for i in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, params=params(i))
+                response.raise_for_status()
+                durations.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=concurrency)) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        return durations, errors, time.perf_counter() - start
+
+
+def __free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def __translate_stub_handler(latency):
+    class TranslateStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            queries = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))['queries']
+            time.sleep(latency)
+            body = json.dumps({'results': [{'en': query['terms']} for query in queries]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TranslateStubHandler
+
+
+def __search_stub_handler(latency, translate_url, pages, hits):
+    class SearchStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            phrases = [phrase.split(' ') for phrase in re.findall(r'default contains "([^"]*)"', request['yql'])]
+            # the multilang searcher translates all phrases with one word2word request
+            translation_request = urllib.request.Request(
+                translate_url, json.dumps({'queries': [{'source': 'en', 'terms': phrase} for phrase in phrases]})
+                .encode(), {'Content-Type': 'application/json'})
+            with urllib.request.urlopen(translation_request) as response:
+                translations = json.loads(response.read())['results']
+            time.sleep(latency)
+            offset = request.get('offset', 0)
+            body = json.dumps({'root': {
+                'fields': {'totalCount': pages},
+                'children': [{'id': f'benchmark_{page}', 'relevance': 1.0,
+                              'fields': {'parent_doc': 'benchmark', 'page': page, 'language': 'en'}}
+                             for page in [(offset + i) % pages for i in range(request.get('hits', hits))]],
+                'query-metadata': {'translations': [{
+                    'translations': [{'content': terms, 'languageCode': language}
+                                     for language, terms in translation.items()],
+                    'languages': list(translation.keys()),
+                    'synonyms': []
+                } for translation in translations]}
+            }}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SearchStubHandler
+
+
+def benchmark_query_analysis(args):
+    """
+    Compare the separate stem, stem map and term collection per translation (previous approach) with the single-pass
+    phrase analysis on queries with many translated phrases
+    """
+    import stemmer
+    import vespa_util
+
+    generator = random.Random(42)
+    vocabulary = list(build_dense_page(args.words)['boxes'].keys())
+    queries = [[{'translations': [{'languageCode': language_code,
+                                   'content': generator.sample(vocabulary, args.phrase_words)}
+                                  for language_code in stemmer.languages]}
+                for _ in range(args.phrases)]
+               for _ in range(args.queries)]
+    print(f'{args.queries} queries of {args.phrases} phrases in {len(stemmer.languages)} languages')
+
+    def collect_separately(phrase_translations):
+        terms = set()
+        stems = {}
+        stem_map = {}
+        for translation in phrase_translations['translations']:
+            for term in translation['content']:
+                terms.add(term.lower())
+        for translation in phrase_translations['translations']:
+            for stem, values in stemmer.map_stems_to_words(translation['content'],
+                                                           translation['languageCode']).items():
+                if stem in stems:
+                    stems[stem]['terms'] = list(set(values['terms'] + stems[stem]['terms']))
+                    stems[stem]['languages'] = list(set(values['languages'] + stems[stem]['languages']))
+                else:
+                    stems[stem] = values
+        for translation in phrase_translations['translations']:
+            stem_map.update(stemmer.map_words_to_stems(translation['content'], translation['languageCode']))
+        return {'stems': stems, 'stemMap': stem_map, 'flatTerms': list(terms)}
+
+    def normalize(analysis):
+        return ({stem: (set(values['terms']), set(values['languages'])) for stem, values in analysis['stems'].items()},
+                analysis['stemMap'], set(analysis['flatTerms']))
+
+    # the stem cache is warm for all approaches
+    previous = [[collect_separately(phrase) for phrase in query] for query in queries]
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        previous = [[collect_separately(phrase) for phrase in query] for query in queries]
+    separately = time.perf_counter() - start
+    __report('per translation', separately, args.repetitions * args.queries)
+
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        vespa_util.analysis_cache.clear()
+        analyses = [[vespa_util.analyze_phrase(phrase) for phrase in query] for query in queries]
+    __report('single pass', time.perf_counter() - start, args.repetitions * args.queries, separately)
+    start = time.perf_counter()
+    for _ in range(args.repetitions):
+        analyses = [[vespa_util.analyze_phrase(phrase) for phrase in query] for query in queries]
+    __report('cached', time.perf_counter() - start, args.repetitions * args.queries, separately)
+    assert [[normalize(analysis) for analysis in query] for query in previous] == \
+           [[normalize(analysis) for analysis in query] for query in analyses], 'phrase analyses differ'
+
+
+def benchmark_spatial(args):
+    """
+    Compare snippet region queries on a dense page (sorting all boxes, sorting only the region's boxes and the cached
+    spatial index), flattening the page with and without the stored reading order and the snippet box merge of image_processing (scan of all merged boxes vs. last merged box)
+    """
+    from functools import cmp_to_key
+
+    import bounding_boxes
+    import image_processing
+
+    page_data = build_dense_page(args.words)
+    generator = random.Random(42)
+    height = page_data['dimensions']['origHeight']
+    regions = []
+    for _ in range(args.regions):
+        x, y = generator.uniform(0, 300), generator.uniform(0, height - 300)
+        regions.append([x, x + generator.uniform(100, 300), y, y + generator.uniform(20, 300)])
+    compare_boxes = getattr(bounding_boxes, '__cmp_boxes')
+    filter_outside_boxes = getattr(bounding_boxes, '__filter_outside_boxes')
+
+    def sort_all(region):
+        # previous approach: sort every box of the page, then filter
+        flat_boxes = [{'box': box, 'word': word} for word, boxes in page_data['boxes'].items() for box in boxes]
+        return filter_outside_boxes(sorted(flat_boxes, key=cmp_to_key(compare_boxes)), region)
+
+    start = time.perf_counter()
+    expected = [sort_all(region) for region in regions]
+    sorted_all = time.perf_counter() - start
+    __report('sort page', sorted_all, len(regions))
+    start = time.perf_counter()
+    results = [bounding_boxes.flatten_snippet_bounding_boxes(page_data['boxes'], region) for region in regions]
+    __report('sort region', time.perf_counter() - start, len(regions), sorted_all)
+    assert results == expected, 'region boxes differ'
+    start = time.perf_counter()
+    box_index = bounding_boxes.BoxIndex(page_data['boxes'], bounding_boxes.reading_order(page_data['boxes']))
+    __report('index build', time.perf_counter() - start, 1)
+    start = time.perf_counter()
+    results = [bounding_boxes.flatten_snippet_bounding_boxes(box_index, region) for region in regions]
+    __report('index query', time.perf_counter() - start, len(regions), sorted_all)
+    assert results == expected, 'region boxes differ'
+
+    # whole page in reading order (/bounding-boxes/ and the index build): sorting vs. the order stored at import
+    order = bounding_boxes.reading_order(page_data['boxes'])
+    start = time.perf_counter()
+    expected = [bounding_boxes.flatten_bounding_boxes(page_data['boxes']) for _ in range(args.pages)]
+    sorted_page = time.perf_counter() - start
+    __report('sort page order', sorted_page, args.pages)
+    start = time.perf_counter()
+    results = [bounding_boxes.flatten_bounding_boxes(page_data['boxes'], order=order) for _ in range(args.pages)]
+    __report('stored page order', time.perf_counter() - start, args.pages, sorted_page)
+    assert results == expected, 'page boxes differ'
+
+    # snippet boxes of a frequent term, one every few lines (no collisions)
+    snippet_boxes = [[30, 40 + 40 * line, 300, 50 + 40 * line] for line in range(args.snippet_boxes)]
+    generator.shuffle(snippet_boxes)
+
+    def scan_merged(boxes):
+        # previous approach: look for a colliding box among all merged boxes
+        merged_boxes = []
+        for box in sorted(boxes, key=lambda b: b[1]):
+            colliding_index = next((i for i, merged_box in enumerate(merged_boxes)
+                                    if getattr(image_processing, '__collides')(box, merged_box)), -1)
+            if colliding_index > -1:
+                joined_box = [box[0], min(box[1], merged_boxes[colliding_index][1]),
+                              box[2], max(box[3], merged_boxes[colliding_index][3])]
+                merged_boxes.pop(colliding_index)
+                merged_boxes.append(joined_box)
+            else:
+                merged_boxes.append(box)
+        return merged_boxes
+
+    start = time.perf_counter()
+    expected = scan_merged([list(box) for box in snippet_boxes])
+    scanned = time.perf_counter() - start
+    __report('merge scan', scanned, len(snippet_boxes))
+    start = time.perf_counter()
+    merged = getattr(image_processing, '__filter_boxes')([list(box) for box in snippet_boxes])
+    __report('merge last', time.perf_counter() - start, len(snippet_boxes), scanned)
+    assert merged == expected, 'merged snippet boxes differ'
+
+
+def build_dense_page(words, seed=42):
+    """
+    Generate page metadata of a dense newspaper-like page with the given amount of word boxes
+    """
+    generator = random.Random(seed)
+    vocabulary = [''.join(generator.choice('abcdefghijklmnopqrstuvwxyzäöü') for _ in range(generator.randint(2, 12)))
+                  for _ in range(max(1, words // 3))]
+    boxes = {}
+    for i in range(words):
+        line, column = divmod(i, 12)
+        x0 = 30 + column * 45 + generator.random() * 3
+        y0 = 2000 - line * 11 - generator.random()
+        boxes.setdefault(generator.choice(vocabulary), []).append([x0, x0 + 40, y0, y0 + 9])
+    stems = {}
+    for word in boxes:
+        stems.setdefault(word[:max(2, len(word) - 2)], []).append(word)
+    return {
+        'boxes': boxes,
+        'stems': stems,
+        'dimensions': {'scale': 2.77, 'thumbScale': 2.77, 'origWidth': 600, 'origHeight': 2050}
+    }
+
+
+def __rss():
+    with open('/proc/self/statm', 'r') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def __build_fixture_pdf(path, pages):
+    images = []
+    for page_no in range(pages):
+        image = Image.new('RGB', (1240, 1754), 'white')
+        draw = ImageDraw.Draw(image)
+        for line in range(60):
+            draw.text((80, 80 + line * 26), f'Page {page_no} line {line} - the quick brown fox jumps over the lazy dog',
+                      fill='black')
+        images.append(image)
+    images[0].save(path, 'PDF', resolution=150, save_all=True, append_images=images[1:])
+    return path
+
+
+def __report(label, duration, count, baseline=None):
+    speedup = f' | speedup x{baseline / duration:.2f}' if baseline else ''
+    print(f'{label:>20}: {duration:8.2f}s total | {1000 * duration / count:8.2f}ms per item{speedup}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the vespa-api import and search helpers')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    raster = subparsers.add_parser('raster', help='per-page vs. per-document PDF rasterization')
+    raster.add_argument('--pdf', type=str, default=None, help='PDF to rasterize (default: generated fixture)')
+    raster.add_argument('--pages', type=int, default=300, help='page count of the generated fixture PDF')
+    raster.add_argument('--chunk-sizes', type=int, nargs='+', default=[10, 50],
+                        help='chunk sizes of the per-document rasterizer')
+    raster.set_defaults(func=benchmark_raster)
+
+    feed = subparsers.add_parser('feed', help='sequential vs. batched feeding against a local vespa stub')
+    feed.add_argument('--documents', type=int, default=1000, help='number of documents to feed')
+    feed.add_argument('--latency', type=float, default=0.005, help='stub response latency in seconds')
+    feed.add_argument('--error-rate', type=float, default=0.01, help='share of stub responses failing with 503')
+    feed.add_argument('--in-flight', type=int, nargs='+', default=[4, 16], help='in-flight windows to compare')
+    feed.set_defaults(func=benchmark_feed)
+
+    metadata = subparsers.add_parser('metadata', help='JSON vs. binary page metadata load time and memory')
+    metadata.add_argument('--pages', type=int, default=50, help='number of pages to load')
+    metadata.add_argument('--words', type=int, default=5000, help='word boxes per page')
+    metadata.set_defaults(func=benchmark_metadata)
+
+    search_payload = subparsers.add_parser('search-payload', help='full vs. lean /search/ bounding box data')
+    search_payload.add_argument('--hits', type=int, default=20, help='hits per result page')
+    search_payload.add_argument('--words', type=int, default=5000, help='word boxes per page')
+    search_payload.add_argument('--repetitions', type=int, default=50, help='measured requests per mode')
+    search_payload.set_defaults(func=benchmark_search_payload)
+
+    hit_metadata = subparsers.add_parser('hit-metadata', help='sequential vs. concurrent metadata loading of hits')
+    hit_metadata.add_argument('--hits', type=int, nargs='+', default=[10, 50], help='hits per result page')
+    hit_metadata.add_argument('--words', type=int, default=1000, help='word boxes per page')
+    hit_metadata.add_argument('--latency', type=float, default=0.005, help='simulated storage latency per file')
+    hit_metadata.add_argument('--repetitions', type=int, default=10, help='measured result pages')
+    hit_metadata.set_defaults(func=benchmark_hit_metadata)
+
+    tiles = subparsers.add_parser('tiles', help='snippet crops from full thumbnails vs. page tile containers')
+    tiles.add_argument('--width', type=int, default=2000, help='thumbnail width')
+    tiles.add_argument('--height', type=int, default=2800, help='thumbnail height')
+    tiles.add_argument('--snippets', type=int, default=3, help='snippets cropped per request')
+    tiles.add_argument('--requests', type=int, default=50, help='number of measured snippet requests')
+    tiles.set_defaults(func=benchmark_tiles)
+
+    synonyms = subparsers.add_parser('synonyms', help='per-synonym list scans vs. single-pass synonym matcher')
+    synonyms.add_argument('--words', type=int, default=5000, help='words per page')
+    synonyms.add_argument('--synonyms', type=int, default=500, help='number of synonyms')
+    synonyms.add_argument('--repetitions', type=int, default=5, help='measured pages')
+    synonyms.set_defaults(func=benchmark_synonyms)
+
+    stemming = subparsers.add_parser('stemming', help='stemmer per call vs. shared stemmers with stem cache')
+    stemming.add_argument('--page', type=str, default=None,
+                          help='page metadata file (<output>/<document>/<page>.json|.bin) to take the vocabulary from '
+                               '(default: generated page)')
+    stemming.add_argument('--words', type=int, default=5000, help='word boxes of the generated page')
+    stemming.add_argument('--language', type=str, default='en', help='language code of the page')
+    stemming.add_argument('--repetitions', type=int, default=20, help='measured stemming runs')
+    stemming.set_defaults(func=benchmark_stemming)
+
+    load = subparsers.add_parser('load', help='sync vs. async server throughput against local vespa and word2word stubs')
+    load.add_argument('--workers', type=int, default=1, help='worker processes of each server')
+    load.add_argument('--concurrency', type=int, default=32, help='concurrent clients')
+    load.add_argument('--requests', type=int, default=500, help='search requests per server')
+    load.add_argument('--hits', type=int, default=5, help='hits per search')
+    load.add_argument('--pages', type=int, default=50, help='generated pages')
+    load.add_argument('--words', type=int, default=1000, help='word boxes per page')
+    load.add_argument('--vespa-latency', type=float, default=0.05, help='vespa stub latency in seconds')
+    load.add_argument('--translate-latency', type=float, default=0.02, help='word2word stub latency in seconds')
+    load.set_defaults(func=benchmark_load)
+
+    query_analysis = subparsers.add_parser('query-analysis', help='per-translation vs. single-pass phrase analysis')
+    query_analysis.add_argument('--queries', type=int, default=100, help='number of distinct queries')
+    query_analysis.add_argument('--phrases', type=int, default=10, help='phrases per query')
+    query_analysis.add_argument('--phrase-words', type=int, default=3, help='words per translated phrase')
+    query_analysis.add_argument('--words', type=int, default=5000, help='size of the generated vocabulary')
+    query_analysis.add_argument('--repetitions', type=int, default=5, help='measured runs over all queries')
+    query_analysis.set_defaults(func=benchmark_query_analysis)
+
+    spatial = subparsers.add_parser('spatial', help='snippet region queries and snippet box merges on a dense page')
+    spatial.add_argument('--words', type=int, default=5000, help='word boxes of the generated page')
+    spatial.add_argument('--regions', type=int, default=100, help='number of snippet regions')
+    spatial.add_argument('--pages', type=int, default=20, help='number of whole page flattenings')
+    spatial.add_argument('--snippet-boxes', type=int, default=2000, help='snippet boxes merged')
+    spatial.set_defaults(func=benchmark_spatial)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+suffix = '.bin'
+magic = b'AVPM'
+version = 2
+# magic, version, scale, thumbScale, origWidth, origHeight,
+# word count, box count, stem count, stem reference count, word blob size, stem blob size
+header = struct.Struct('<4sI4d6I')
+# since version 2: reading order length
+order_header = struct.Struct('<I')
+
+
+def write(path, page_data: dict):
+    """
+    Write page metadata in the compact binary format:
+    a fixed header followed by uint32 offset tables, a float32 box array and utf-8 string tables.
+    Words and stems are sorted by their utf-8 encoding, so readers can binary search them without decoding
+    the whole page. The reading order is stored as indexes into the box array.
+    Arrays are stored in native (little-endian on all supported platforms) byte order.
+
+    :param path: target file path
+    :param page_data: dict with boxes (word => [boxes]), stems (stem => [words]), dimensions and optionally the
+                      reading order ([word, box index] pairs)
+    """
+    boxes = page_data['boxes']
+    stems = page_data['stems']
+    dimensions = page_data['dimensions']
+
+    # stems might reference words without boxes - they get an empty box range
+    encoded_words = sorted({word.encode() for word in boxes} |
+                           {word.encode() for words in stems.values() for word in words})
+    word_index = {word: i for i, word in enumerate(encoded_words)}
+    encoded_stems = sorted(stem.encode() for stem in stems)
+
+    word_offsets, box_starts, box_values = array('I', [0]), array('I', [0]), array('f')
+    for word in encoded_words:
+        word_offsets.append(word_offsets[-1] + len(word))
+        for box in boxes.get(word.decode(), []):
+            box_values.extend(box)
+        box_starts.append(len(box_values) // 4)
+    order = array('I', (box_starts[word_index[word.encode()]] + i for word, i in page_data.get('order', [])))
+
+    stem_offsets, stem_ref_starts, stem_refs = array('I', [0]), array('I', [0]), array('I')
+    for stem in encoded_stems:
+        stem_offsets.append(stem_offsets[-1] + len(stem))
+        stem_refs.extend(word_index[word.encode()] for word in stems[stem.decode()])
+        stem_ref_starts.append(len(stem_refs))
+
+    word_blob = b''.join(encoded_words)
+    stem_blob = b''.join(encoded_stems)
+    with open(path, 'wb') as file:
+        file.write(header.pack(magic, version, dimensions['scale'], dimensions['thumbScale'],
+                               dimensions['origWidth'], dimensions['origHeight'],
+                               len(encoded_words), len(box_values) // 4, len(encoded_stems), len(stem_refs),
+                               len(word_blob), len(stem_blob)))
+        file.write(order_header.pack(len(order)))
+        for table in (word_offsets, box_starts, stem_offsets, stem_ref_starts, stem_refs, order, box_values):
+            file.write(table.tobytes())
+        file.write(word_blob)
+        file.write(stem_blob)
+
+
+class BinaryPageMetadata(Mapping):
+    """
+    Read-only, memory-mapped view of a binary page metadata file.
+    Behaves like the JSON page metadata dict (boxes, stems, dimensions and order, if the file has a reading order),
+    but only decodes what is accessed. Version 1 files (without reading order) can still be read.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.__buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (file_magic, file_version, scale, thumb_scale, orig_width, orig_height, word_count, box_count, stem_count,
+         stem_ref_count, word_blob_size, stem_blob_size) = header.unpack_from(self.__buffer)
+        if file_magic != magic or file_version not in (1, version):
+            raise ValueError(f'{path} is not a binary page metadata file (version {version})')
+
+        view = memoryview(self.__buffer)
+        offset = header.size
+        order_count = None
+        if file_version >= 2:
+            order_count, = order_header.unpack_from(self.__buffer, offset)
+            offset += order_header.size
+
+        def table(length, format, item_size=4):
+            nonlocal offset
+            start, offset = offset, offset + length * item_size
+            return view[start:offset].cast(format)
+
+        word_offsets = table(word_count + 1, 'I')
+        box_starts = table(word_count + 1, 'I')
+        stem_offsets = table(stem_count + 1, 'I')
+        stem_ref_starts = table(stem_count + 1, 'I')
+        stem_refs = table(stem_ref_count, 'I')
+        order = table(order_count, 'I') if order_count else None
+        box_values = table(box_count * 4, 'f')
+        word_blob = table(word_blob_size, 'B', 1)
+        stem_blob = table(stem_blob_size, 'B', 1)
+
+        self.__words = _StringTable(word_blob, word_offsets)
+        self.__data = {
+            'boxes': _WordBoxes(self.__words, box_starts, box_values),
+            'stems': _StemWords(_StringTable(stem_blob, stem_offsets), stem_ref_starts, stem_refs, self.__words),
+            'dimensions': {
+                'scale': scale,
+                'thumbScale': thumb_scale,
+                'origWidth': orig_width,
+                'origHeight': orig_height
+            }
+        }
+        if order is not None:
+            self.__data['order'] = _ReadingOrder(self.__words, box_starts, order)
+
+    def __getitem__(self, key):
+        return self.__data[key]
+
+    def __iter__(self):
+        return iter(self.__data)
+
+    def __len__(self):
+        return len(self.__data)
+
+    def to_dict(self, order=True):
+        """
+        :param order: include the reading order, if the file has one
+        :return: fully decoded page metadata as plain (JSON serializable) dict
+        """
+        page_data = {
+            'boxes': dict(self.__data['boxes'].items()),
+            'stems': dict(self.__data['stems'].items()),
+            'dimensions': dict(self.__data['dimensions'])
+        }
+        if order and 'order' in self.__data:
+            page_data['order'] = list(self.__data['order'])
+        return page_data
+
+
+class _StringTable:
+    """
+    Sorted utf-8 strings stored back to back, delimited by an offset table
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def encoded(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index):
+        return self.encoded(index).decode()
+
+    def index(self, string):
+        """
+        :return: index of string in table or -1
+        """
+        encoded = string.encode()
+        index = bisect_left(range(len(self)), encoded, key=self.encoded)
+        if index < len(self) and self.encoded(index) == encoded:
+            return index
+        return -1
+
+
+class _WordBoxes(Mapping):
+    def __init__(self, words: _StringTable, box_starts, box_values):
+        self.__words = words
+        self.__box_starts = box_starts
+        self.__box_values = box_values
+
+    def boxes(self, index):
+        values = self.__box_values[4 * self.__box_starts[index]:4 * self.__box_starts[index + 1]].tolist()
+        return [values[i:i + 4] for i in range(0, len(values), 4)]
+
+    def __getitem__(self, word):
+        index = self.__words.index(word)
+        if index < 0 or self.__box_starts[index] == self.__box_starts[index + 1]:
+            raise KeyError(word)
+        return self.boxes(index)
+
+    def __iter__(self):
+        for index in range(len(self.__words)):
+            if self.__box_starts[index] != self.__box_starts[index + 1]:
+                yield self.__words[index]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def items(self):
+        return ((word, self[word]) for word in self)
+
+
+class _StemWords(Mapping):
+    def __init__(self, stems: _StringTable, ref_starts, refs, words: _StringTable):
+        self.__stems = stems
+        self.__ref_starts = ref_starts
+        self.__refs = refs
+        self.__words = words
+
+    def words(self, index):
+        return [self.__words[ref] for ref in self.__refs[self.__ref_starts[index]:self.__ref_starts[index + 1]]]
+
+    def __getitem__(self, stem):
+        index = self.__stems.index(stem)
+        if index < 0:
+            raise KeyError(stem)
+        return self.words(index)
+
+    def __iter__(self):
+        return (self.__stems[index] for index in range(len(self.__stems)))
+
+    def __len__(self):
+        return len(self.__stems)
+
+    def items(self):
+        return ((self.__stems[index], self.words(index)) for index in range(len(self.__stems)))
+
+
+class _ReadingOrder(Sequence):
+    """
+    Reading order of the boxes as [word, box index] pairs, decoded from indexes into the box array
+    """
+
+    def __init__(self, words: _StringTable, box_starts, order):
+        self.__words = words
+        self.__box_starts = box_starts
+        self.__order = order
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        box = self.__order[index]
+        # words without boxes have empty ranges, bisect_right skips them
+        word_index = bisect_right(self.__box_starts, box) - 1
+        return [self.__words[word_index], box - self.__box_starts[word_index]]
+
+    def __len__(self):
+        return len(self.__order)
@@ -1,15 +1,35 @@
 import math
+from bisect import bisect_left, bisect_right
 from functools import cmp_to_key
 
 
-def flatten_bounding_boxes(bounding_boxes, max_width=math.inf, max_height=math.inf):
+def reading_order(bounding_boxes):
     """
-    Flatten dict from terms to bounding boxes into a list sorted by box positions (ltr)
+    Sort the boxes of a page by their positions (ltr), so the order can be stored with the page metadata
 
     :param bounding_boxes: dict with shape term => [boxes]
+    :return: list of [term, box index] pairs in reading order
+    """
+    flat_boxes = [{'box': box, 'word': word, 'index': i}
+                  for word, boxes in bounding_boxes.items() for i, box in enumerate(boxes)]
+    return [[box['word'], box['index']] for box in sorted(flat_boxes, key=cmp_to_key(__cmp_boxes))]
+
+
+def flatten_bounding_boxes(bounding_boxes, max_width=math.inf, max_height=math.inf, order=None):
+    """
+    Flatten dict from terms to bounding boxes into a list sorted by box positions (ltr)
+
+    :param bounding_boxes: dict with shape term => [boxes] or BoxIndex of a page
     :param max_width: Width that should not be exceeded
     :param max_height: Height that should not be exceeded
+    :param order: stored reading order of the page (see reading_order) - the boxes are sorted, if it is missing
     """
+    if isinstance(bounding_boxes, BoxIndex):
+        return [box_item for box_item in bounding_boxes.flat_boxes
+                if round(box_item['box'][1]) <= max_width and round(box_item['box'][3]) <= max_height]
+    if order is not None:
+        return [box_item for box_item in __ordered_boxes(bounding_boxes, order)
+                if round(box_item['box'][1]) <= max_width and round(box_item['box'][3]) <= max_height]
     flat_boxes = []
     for word, boxes in bounding_boxes.items():
         for box in boxes:
@@ -21,17 +41,58 @@ def flatten_bounding_boxes(bounding_boxes, max_width=math.inf, max_height=math.i
     return sorted(flat_boxes, key=cmp_to_key(__cmp_boxes))
 
 
-def flatten_snippet_bounding_boxes(bounding_boxes, surrounding_box):
+def flatten_snippet_bounding_boxes(bounding_boxes, surrounding_box, order=None):
     """
         Flatten dict from terms to bounding boxes into a list sorted by box positions (ltr).
         Also filter out boxes not contained in surrounding box
 
-        :param bounding_boxes: dict with shape term => [boxes]
+        :param bounding_boxes: dict with shape term => [boxes] or BoxIndex of a page
         :param surrounding_box: outer bounds of snippet
+        :param order: stored reading order of the page (see reading_order), if bounding_boxes is a dict
     """
-    flat_boxes = flatten_bounding_boxes(bounding_boxes)
-    filtered_flat_boxes = __filter_outside_boxes(flat_boxes, surrounding_box)
-    return filtered_flat_boxes
+    if isinstance(bounding_boxes, BoxIndex):
+        return __filter_outside_boxes(bounding_boxes.candidates(surrounding_box), surrounding_box)
+    if order is not None:
+        return __filter_outside_boxes(__ordered_boxes(bounding_boxes, order), surrounding_box)
+    # only the boxes inside the snippet get sorted
+    flat_boxes = [{'box': box, 'word': word} for word, boxes in bounding_boxes.items() for box in boxes]
+    return sorted(__filter_outside_boxes(flat_boxes, surrounding_box), key=cmp_to_key(__cmp_boxes))
+
+
+class BoxIndex:
+    """
+    Word boxes of a page in reading order (see flatten_bounding_boxes) with an index over their vertical start
+    positions, so the boxes of a region are found by binary search instead of a scan over the whole page
+    """
+
+    def __init__(self, bounding_boxes, order=None):
+        self.flat_boxes = flatten_bounding_boxes(bounding_boxes, order=order)
+        # reading order ranks sorted by vertical box start
+        self.__ranks = sorted(range(len(self.flat_boxes)), key=lambda rank: self.flat_boxes[rank]['box'][2])
+        self.__y_starts = [self.flat_boxes[rank]['box'][2] for rank in self.__ranks]
+
+    def candidates(self, surrounding_box):
+        """
+        :return: boxes in reading order, which vertically start within the surrounding box (with a margin for
+                 rounding) - a superset of the boxes contained in it
+        """
+        start = bisect_left(self.__y_starts, surrounding_box[2] - 1)
+        end = bisect_right(self.__y_starts, surrounding_box[3] + 1)
+        return [self.flat_boxes[rank] for rank in sorted(self.__ranks[start:end])]
+
+    def __len__(self):
+        return len(self.flat_boxes)
+
+
+def __ordered_boxes(bounding_boxes, order):
+    # the boxes of a word are looked up once - binary page metadata decodes them on every access
+    word_boxes = {}
+    flat_boxes = []
+    for word, i in order:
+        if word not in word_boxes:
+            word_boxes[word] = bounding_boxes[word]
+        flat_boxes.append({'box': word_boxes[word][i], 'word': word})
+    return flat_boxes
 
 
 def __filter_outside_boxes(bounding_boxes, surrounding_box):
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+caches = {}
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least-recently-used cache with hit/miss counters.
+    With a ttl (seconds), entries expire after this time - expired entries count as misses.
+    Every cache registers itself by name, so its statistics can be exposed via the API.
+    Single use caches (e.g. prefetched results) hand out each entry once via take: only taken entries count as hits
+    and only entries dropped unused (evicted, expired or replaced) as misses, so the hit ratio is the share of entries
+    that were used.
+    """
+
+    def __init__(self, name, max_size, ttl=None, single_use=False):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.single_use = single_use
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        caches[name] = self
+
+    def get(self, key, default=None):
+        with self.__lock:
+            try:
+                value, expires_at = self.__entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.__entries[key]
+                self.misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, key):
+        """
+        :return: True if key has an unexpired entry - neither counted nor affecting the eviction order
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def take(self, key, default=None):
+        """
+        Remove and return the entry of key - looking up a missing key is not counted
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.__lock:
+            if self.single_use and key in self.__entries:
+                self.misses += 1
+            self.__entries[key] = (value, time.monotonic() + self.ttl if self.ttl else None)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                if self.single_use:
+                    self.misses += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'size': len(self.__entries),
+            'maxSize': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': self.hits / requests if requests else 0.0
+        }
+
+
+def stats():
+    """
+    :return: statistics of all registered caches by name
+    """
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def generation(path):
+    """
+    :return: current generation of a generation file (0 if it does not exist yet) - part of the keys of caches,
+             whose entries become stale when data changes in another process
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_generation(path):
+    """
+    Start a new generation of a generation file, all cache entries keyed by an older generation are stale
+    """
+    previous = generation(path)
+    with open(path, 'a'):
+        pass
+    # the generation must change, even if the clock resolution of the file system is coarse
+    now = max(time.time_ns(), previous + 1)
+    os.utime(path, ns=(now, now))
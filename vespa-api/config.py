@@ -1,10 +1,50 @@
-metadata_path = "/output"
+import os
+
+metadata_path = os.environ.get("METADATA_PATH", "/output")
 convert_type = "JPEG"
 convert_suffix = ".jpg"
 snippet_dir = "/tmp/vespa-api"
+snippet_cache_max_bytes = 512 * 1024 * 1024
+snippet_cache_low_watermark = 0.9  # share of the byte limit kept after an eviction
+snippet_temp_max_age = 3600  # seconds after which unfinished snippet writes (e.g. of crashed workers) are removed
+snippet_inline_quality = 75
+tile_strip_height = 128  # pixels per strip of the page tile containers used for snippet crops
+tile_quality = 90
 
 snippet_margin = 0.03  # percent
 snippet_highlight_color = (0, 254, 255, 128)
 
-vespa_url = "http://baseline"
-vespa_port = 8080
\ No newline at end of file
+vespa_url = os.environ.get("VESPA_URL", "http://baseline")
+vespa_port = int(os.environ.get("VESPA_PORT", 8080))
+vespa_pool_size = 20  # pooled keep-alive connections per worker
+vespa_keepalive_expiry = 60  # seconds
+vespa_connect_timeout = 2  # seconds
+vespa_timeout = 10  # seconds, read timeout of search requests
+vespa_max_retries = 2
+vespa_backoff = 0.2  # seconds, doubled with every retry
+vespa_breaker_threshold = 5  # consecutive failed requests opening the circuit breaker
+vespa_breaker_reset = 30  # seconds until an open circuit breaker lets a trial request through
+
+async_executor_workers = 8  # threads of the async server (async_app.py) for CPU and disk bound request steps
+
+import_pages_per_task = 25
+raster_chunk_size = 10  # pages rendered per poppler call during import
+
+feed_batch_size = 64
+feed_max_in_flight = 16  # concurrent feed requests per import process
+feed_max_retries = 5
+feed_backoff = 0.5  # seconds, doubled with every retry
+feed_timeout = 30  # seconds
+feed_dead_letter_path = f'{metadata_path}/feed_dead_letter.jsonl'
+
+stem_cache_size = 50000  # cached word stems per stemmer language
+query_analysis_cache_size = 4096  # stems, stem maps and terms of translated query phrases
+metadata_cache_size = 512  # parsed page metadata files kept in memory per worker
+query_cache_size = 128  # cached /search/ results per worker
+query_cache_ttl = 300  # seconds
+prefetch_cache_size = 64  # next result pages fetched in the background (opt-in, /search/?prefetch=...)
+prefetch_workers = 2  # threads fetching next result pages
+prefetch_max_pending = 4  # further prefetches are dropped while this many are waiting or running
+index_generation_path = f'{metadata_path}/index_generation'  # touched by every feed, invalidates cached results
+metadata_load_workers = 16  # threads loading the page metadata of search hits concurrently
+metadata_format = 'json'  # 'json' | 'binary' - format of page metadata files written by the import
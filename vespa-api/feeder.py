@@ -0,0 +1,211 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+import httpx
+
+import cache_util
+import config
+
+retry_status_codes = [429, 500, 502, 503, 504]
+
+
+class FeedStats:
+    """
+    Counters and per-document latencies of a feeding run, mergeable across import processes
+    """
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.latencies = []
+        self.duration = 0.0
+
+    def merge(self, other):
+        self.succeeded += other.succeeded
+        self.failed += other.failed
+        self.retries += other.retries
+        self.latencies.extend(other.latencies)
+        self.duration += other.duration
+
+    def percentile(self, percent):
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1, round(percent / 100 * (len(latencies) - 1)))
+        return latencies[index]
+
+    def report(self, wall_time=None):
+        """
+        :param wall_time: Elapsed wall clock time of the run, defaults to the accumulated time spent feeding
+        """
+        duration = wall_time if wall_time is not None else self.duration
+        throughput = (self.succeeded + self.failed) / duration if duration > 0 else 0.0
+        return f'Feed - {self.succeeded} documents fed, {self.failed} failed, {self.retries} retries | ' \
+               f'{throughput:.1f} docs/s | latency p50: {1000 * self.percentile(50):.1f}ms, ' \
+               f'p95: {1000 * self.percentile(95):.1f}ms, p99: {1000 * self.percentile(99):.1f}ms'
+
+
+class BatchFeeder:
+    """
+    Buffers documents and feeds them concurrently to the vespa document API, with a bounded number of requests
+    in flight. Failed requests are retried with exponential backoff, documents that still fail end up in a
+    dead-letter file (one JSON document per line), which can be replayed with `python feeder.py --replay`.
+    """
+
+    def __init__(self, url=config.vespa_url, port=config.vespa_port, schema='baseline', namespace='baseline',
+                 batch_size=config.feed_batch_size, max_in_flight=config.feed_max_in_flight,
+                 max_retries=config.feed_max_retries, backoff=config.feed_backoff, timeout=config.feed_timeout,
+                 dead_letter_path=config.feed_dead_letter_path, generation_path=config.index_generation_path):
+        self.endpoint = f'{url}:{port}/document/v1/{namespace}/{schema}/docid/'
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.dead_letter_path = dead_letter_path
+        self.generation_path = generation_path
+        self.stats = FeedStats()
+        self.__buffer = []
+        self.__pending = set()
+        self.__failed_ids = []
+        self.__fed = False
+        self.__lock = threading.Lock()
+        self.__in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.__executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.__client = httpx.Client(limits=httpx.Limits(max_connections=max_in_flight,
+                                                         max_keepalive_connections=max_in_flight))
+        self.__started = None
+
+    def add(self, data_id, fields):
+        """
+        Queue a document for feeding - the buffer is sent as soon as it holds batch_size documents
+        """
+        self.__buffer.append((str(data_id), fields))
+        if len(self.__buffer) >= self.batch_size:
+            self.__send_buffer()
+
+    def flush(self):
+        """
+        Send all buffered documents and wait until every request in flight has finished.
+        If documents were fed, a new generation of generation_path invalidates cached search results of the api.
+        :return: List of ids of documents that failed since the last flush
+        """
+        self.__send_buffer()
+        with self.__lock:
+            pending = list(self.__pending)
+        wait(pending)
+        with self.__lock:
+            if self.__started is not None:
+                self.stats.duration += time.perf_counter() - self.__started
+                self.__started = None
+            failed_ids, self.__failed_ids = self.__failed_ids, []
+            fed, self.__fed = self.__fed, False
+        if fed:
+            cache_util.bump_generation(self.generation_path)
+        return failed_ids
+
+    def pop_stats(self):
+        """
+        :return: Stats collected since the last call
+        """
+        with self.__lock:
+            stats, self.stats = self.stats, FeedStats()
+        return stats
+
+    def close(self):
+        self.flush()
+        self.__executor.shutdown()
+        self.__client.close()
+
+    def __send_buffer(self):
+        buffer, self.__buffer = self.__buffer, []
+        for data_id, fields in buffer:
+            # blocks while the in-flight window is full
+            self.__in_flight.acquire()
+            with self.__lock:
+                if self.__started is None:
+                    self.__started = time.perf_counter()
+            future = self.__executor.submit(self.__feed_document, data_id, fields)
+            with self.__lock:
+                self.__pending.add(future)
+            future.add_done_callback(self.__request_done)
+
+    def __request_done(self, future):
+        with self.__lock:
+            self.__pending.discard(future)
+        self.__in_flight.release()
+
+    def __feed_document(self, data_id, fields):
+        start = time.perf_counter()
+        retries = 0
+        error = None
+        status_code = None
+        while True:
+            try:
+                response = self.__client.post(self.endpoint + quote(data_id, safe=''), json={'fields': fields},
+                                              timeout=self.timeout)
+                status_code = response.status_code
+                if status_code < 400:
+                    error = None
+                    break
+                error = response.text
+                if status_code not in retry_status_codes:
+                    break
+            except httpx.HTTPError as e:
+                status_code = None
+                error = str(e)
+            if retries >= self.max_retries:
+                break
+            time.sleep(self.backoff * 2 ** retries)
+            retries += 1
+
+        latency = time.perf_counter() - start
+        with self.__lock:
+            self.stats.retries += retries
+            self.stats.latencies.append(latency)
+            if error is None:
+                self.stats.succeeded += 1
+                self.__fed = True
+            else:
+                self.stats.failed += 1
+                self.__failed_ids.append(data_id)
+                self.__write_dead_letter(data_id, fields, status_code, error)
+
+    def __write_dead_letter(self, data_id, fields, status_code, error):
+        with open(self.dead_letter_path, 'a') as file:
+            file.write(json.dumps({'id': data_id, 'fields': fields, 'status': status_code, 'error': error}) + '\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def replay_dead_letters(path=config.feed_dead_letter_path):
+    """
+    Feed all documents of a dead-letter file again - documents failing again are written to a fresh dead-letter file
+    """
+    with open(path, 'r') as file:
+        documents = [json.loads(line) for line in file if line.strip()]
+    replay_path = f'{path}.replay'
+    with BatchFeeder(dead_letter_path=replay_path) as feeder:
+        for document in documents:
+            feeder.add(document['id'], document['fields'])
+    print(feeder.stats.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay documents from the feed dead-letter file')
+    parser.add_argument('--replay', type=str, nargs='?', const=config.feed_dead_letter_path, required=True,
+                        help=f'dead-letter file to replay (default: {config.feed_dead_letter_path})')
+    args = parser.parse_args()
+    replay_dead_letters(args.replay)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,61 @@
 from PIL import Image, ImageDraw
 import config
-import json
-from tempfile import NamedTemporaryFile
+import metadata as page_metadata
+import page_tiles
+import snippet_cache
 import os
-from pathlib import Path
+import base64
+from io import BytesIO
 
 # Prevent warning for large images
 Image.MAX_IMAGE_PIXELS = 160000000
 
+# PIL image formats available for inline snippets and their mime types
+inline_formats = {
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp'
+}
 
-def store_snippets(snippets: list[Image]):
-    if not os.path.isdir(config.snippet_dir):
-        os.mkdir(config.snippet_dir)
 
+def build_snippets(document_name, page, query):
+    metadata, page_image, snippet_boxes = __build_snippet_boxes(document_name, page, query)
     snippet_names = []
-    for snippet in snippets:
-        temp_file = NamedTemporaryFile(mode="w+b", suffix=config.convert_suffix, delete=False, dir=config.snippet_dir)
-        snippet.save(temp_file, config.convert_type)
-        snippet_names.append(Path(temp_file.name).stem)
+    image_version = os.stat(__page_image_path(document_name, page)).st_mtime_ns
+    for box in snippet_boxes:
+        snippet_name = snippet_cache.cache.key(document_name, page, box, image_version)
+        if not snippet_cache.cache.contains(snippet_name):
+            snippet = page_image.crop(box)
+            snippet_cache.cache.put(snippet_name, snippet)
+            snippet.close()
+        snippet_names.append(snippet_name)
+    page_image.close()
+    return snippet_names, __snippet_boxes_pil2pdf(snippet_boxes, metadata), metadata
+
+
+def build_inline_snippets(document_name, page, query, image_format=config.convert_type,
+                          quality=config.snippet_inline_quality):
+    """
+    Build snippets entirely in memory, without touching the snippet cache on disk
+
+    :param image_format: PIL image format of the encoded snippets (one of inline_formats)
+    :param quality: encoding quality (1-95)
+    :return: list of snippet data URIs, snippet boxes and page metadata
+    """
+    metadata, page_image, snippet_boxes = __build_snippet_boxes(document_name, page, query)
+    snippet_images = []
+    for box in snippet_boxes:
+        snippet = page_image.crop(box)
+        buffer = BytesIO()
+        snippet.save(buffer, image_format, quality=quality)
         snippet.close()
-        temp_file.close()
-    return snippet_names
+        snippet_images.append(f'data:{inline_formats[image_format]};base64,'
+                              f'{base64.b64encode(buffer.getvalue()).decode()}')
+    page_image.close()
+    return snippet_images, __snippet_boxes_pil2pdf(snippet_boxes, metadata), metadata
 
 
-def build_snippets(document_name, page, query):
-    doc_dir = f'{config.metadata_path}/{document_name}'
-    metadata = __load_meta(doc_dir, page)
+def __build_snippet_boxes(document_name, page, query):
+    metadata = page_metadata.load(document_name, page)
     page_image = __open_page_image(document_name, page)
     snippet_boxes = []
     for term in query:
@@ -33,15 +63,12 @@ def build_snippets(document_name, page, query):
             snippet_boxes.extend(__build_term_snippet_boxes(page_image, metadata, term))
         except KeyError:
             pass
-    snippet_boxes = __filter_boxes(snippet_boxes)
-    snippet_names = []
-    for box in snippet_boxes:
-        snippet = page_image.crop(box)
-        snippet_names.extend(store_snippets([snippet]))
-    snippet_boxes = [__box_pil2pdf(box, metadata['dimensions']['thumbScale'], metadata['dimensions']['origHeight'])
-                      for box in snippet_boxes]
-    page_image.close()
-    return snippet_names, snippet_boxes, metadata
+    return metadata, page_image, __filter_boxes(snippet_boxes)
+
+
+def __snippet_boxes_pil2pdf(snippet_boxes, metadata):
+    return [__box_pil2pdf(box, metadata['dimensions']['thumbScale'], metadata['dimensions']['origHeight'])
+            for box in snippet_boxes]
 
 
 def __filter_boxes(boxes):
@@ -49,12 +76,12 @@ def __filter_boxes(boxes):
     filtered_boxes = []
     boxes.sort(key=__sort_boxes)
     for box in boxes:
-        colliding_index = __find_first_colliding_index(box, filtered_boxes)
-        if colliding_index > -1:
-            joined_box = [box[0], min(box[1], filtered_boxes[colliding_index][1]),
-                          box[2], max(box[3], filtered_boxes[colliding_index][3])]
-            filtered_boxes.pop(colliding_index)
-            filtered_boxes.append(joined_box)
+        # boxes are processed by vertical start and filtered boxes are at least 20 pixels apart, so a box can only
+        # collide with the last filtered box
+        if filtered_boxes and __collides(box, filtered_boxes[-1]):
+            joined_box = [box[0], min(box[1], filtered_boxes[-1][1]),
+                          box[2], max(box[3], filtered_boxes[-1][3])]
+            filtered_boxes[-1] = joined_box
         else:
             filtered_boxes.append(box)
     return filtered_boxes
@@ -64,21 +91,18 @@ def __sort_boxes(b):
     return b[1]
 
 
-def __find_first_colliding_index(box, filtered_boxes):
+def __collides(box, filtered_box):
     new_y_start = box[1]
     new_y_end = box[3]
-    for i, filtered_box in enumerate(filtered_boxes):
-        filter_y_start = filtered_box[1]
-        filter_y_end = filtered_box[3]
-        if (filter_y_start == new_y_start or filter_y_end == new_y_end) or (
-                new_y_start <= filter_y_start <= new_y_end) or (
-                filter_y_start <= new_y_start <= filter_y_end) or (
-                abs(new_y_end - filter_y_start) < 20 or abs(filter_y_end - new_y_start) < 20):
-            return i
-    return -1
-
-
-def __build_term_snippet_boxes(marked_page: Image, metadata: dict, term: str):
+    filter_y_start = filtered_box[1]
+    filter_y_end = filtered_box[3]
+    return (filter_y_start == new_y_start or filter_y_end == new_y_end) or (
+            new_y_start <= filter_y_start <= new_y_end) or (
+            filter_y_start <= new_y_start <= filter_y_end) or (
+            abs(new_y_end - filter_y_start) < 20 or abs(filter_y_end - new_y_start) < 20)
+
+
+def __build_term_snippet_boxes(marked_page, metadata: dict, term: str):
     scale = metadata['dimensions']['thumbScale']
     term_boxes = metadata['boxes'][term]
     term_snippet_boxes = []
@@ -89,16 +113,26 @@ def __build_term_snippet_boxes(marked_page: Image, metadata: dict, term: str):
     return term_snippet_boxes
 
 
-def __open_page_image(document_name, page, thumb=True):
+def __page_image_path(document_name, page, thumb=True):
     doc_dir = f'{config.metadata_path}/{document_name}'
-    return Image.open(f'{doc_dir}/{page}{"_thumb" if thumb else ""}{config.convert_suffix}')
+    return f'{doc_dir}/{page}{"_thumb" if thumb else ""}{config.convert_suffix}'
+
+
+def __open_page_image(document_name, page, thumb=True):
+    # thumbnail crops only decode the intersecting strips of the page's tile container, if it exists
+    if thumb:
+        try:
+            return page_tiles.TiledImage(page_tiles.tiles_path(document_name, page))
+        except (FileNotFoundError, ValueError):
+            pass
+    return Image.open(__page_image_path(document_name, page, thumb))
 
 
 def __highlight_page(document_name, page, query, metadata=None):
     doc_dir = f'{config.metadata_path}/{document_name}'
     image = Image.open(f'{doc_dir}/{page}{config.convert_suffix}').convert("RGBA")
     if not metadata:
-        metadata = __load_meta(doc_dir, page)
+        metadata = page_metadata.load(document_name, page)
     overlay = Image.new("RGBA", image.size, (255, 255, 255, 0))
     for term in query:
         __highlight_term(overlay, metadata, term)
@@ -139,18 +173,9 @@ def __add_margins(box, width, height):
     return box
 
 
-def __load_meta(doc_dir, page):
-    with open(f'{doc_dir}/{page}.json', 'r') as file:
-        metadata = json.load(file)
-        return metadata
-
-
 def main():
     snippets, _ = build_snippets('multipage_test', 1, ['adc', 'signal', 'corps'])
     [snippet.show() for snippet in snippets]
-    # file_paths = store_snippets(snippets)
-    # for path in file_paths:
-    #     print(path)
 
 
 if __name__ == '__main__':
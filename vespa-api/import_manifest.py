@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+import config
+
+manifest_name = 'manifest.json'
+
+
+class ImportManifest:
+    """
+    Per-document import state stored next to the page metadata in the document's output folder.
+    Keeps track of the source PDF (content hash) and which pages were completely imported,
+    so re-running an import can skip finished pages and detect changed source files.
+    """
+
+    def __init__(self, name, data=None):
+        self.name = name
+        data = data or {}
+        self.hash = data.get('hash')
+        self.source_size = data.get('sourceSize')
+        self.source_mtime = data.get('sourceMtime')
+        self.page_count = data.get('pageCount')
+        self.pages = set(data.get('pages', []))
+
+    @property
+    def path(self):
+        return f'{config.metadata_path}/{self.name}/{manifest_name}'
+
+    @classmethod
+    def load(cls, name):
+        """
+        Load the manifest of a document
+        :param name: Document name
+        :return: ImportManifest or None if the document has no (readable) manifest yet
+        """
+        try:
+            with open(f'{config.metadata_path}/{name}/{manifest_name}', 'r') as file:
+                return cls(name, json.load(file))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self):
+        # write to a temporary file first, so a crash never leaves a truncated manifest behind
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({
+                'hash': self.hash,
+                'sourceSize': self.source_size,
+                'sourceMtime': self.source_mtime,
+                'pageCount': self.page_count,
+                'pages': sorted(self.pages)
+            }, file)
+        os.replace(temp_path, self.path)
+
+    def matches_source(self, path):
+        """
+        Check if the manifest belongs to the given source file. The content hash is only computed,
+        if size or modification time of the source file changed since the manifest was written.
+        """
+        stat = os.stat(path)
+        if self.hash is not None and stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime:
+            return True
+        return self.hash == file_hash(path)
+
+    def reset(self, path, page_count):
+        """
+        Start over with a new source file - all pages are marked as pending
+        """
+        stat = os.stat(path)
+        self.hash = file_hash(path)
+        self.source_size = stat.st_size
+        self.source_mtime = stat.st_mtime_ns
+        self.page_count = page_count
+        self.pages = set()
+
+    def update_source_stat(self, path):
+        stat = os.stat(path)
+        self.source_size = stat.st_size
+        self.source_mtime = stat.st_mtime_ns
+
+    def mark_done(self, pages):
+        self.pages.update(pages)
+
+    def pending_pages(self):
+        """
+        :return: Sorted list of page numbers still to be imported, or None if the page count is unknown
+        """
+        if self.page_count is None:
+            return None
+        return [page for page in range(self.page_count) if page not in self.pages]
+
+    def is_complete(self):
+        return self.page_count is not None and len(self.pending_pages()) == 0
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 hex digest of a file's content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,147 @@
+import json
+import os
+
+import binary_metadata
+import bounding_boxes
+import config
+from cache_util import LRUCache
+
+cache = LRUCache('page_metadata', config.metadata_cache_size)
+stem_parts_cache = LRUCache('page_stem_parts', config.metadata_cache_size)
+box_index_cache = LRUCache('page_box_index', config.metadata_cache_size)
+suffixes = ['.json', binary_metadata.suffix]
+
+
+def page_path(doc, page, suffix='.json'):
+    return f'{config.metadata_path}/{doc}/{page}{suffix}'
+
+
+def __stat(doc, page):
+    binary_path = page_path(doc, page, binary_metadata.suffix)
+    try:
+        return binary_path, os.stat(binary_path), True
+    except FileNotFoundError:
+        path = page_path(doc, page)
+        return path, os.stat(path), False
+
+
+def etag(doc, page):
+    """
+    :return: entity tag of a page's metadata file, based on its modification time and size
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    path, stat, _ = __stat(doc, page)
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def load(doc, page):
+    """
+    Load the metadata (boxes, stems, dimensions) of a document page, preferring the binary format over JSON.
+    Loaded files are kept in a shared LRU cache, entries are keyed by the file's modification time,
+    so re-imported pages are loaded again.
+    The returned data is shared between callers and must not be modified.
+
+    :param doc: document name
+    :param page: page number
+    :return: dict-like page metadata (see as_dict for a JSON serializable version)
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    path, stat, binary = __stat(doc, page)
+    key = (path, stat.st_mtime_ns)
+    metadata = cache.get(key)
+    if metadata is None:
+        if binary:
+            metadata = binary_metadata.BinaryPageMetadata(key[0])
+        else:
+            with open(key[0], 'r') as file:
+                metadata = json.load(file)
+        cache.put(key, metadata)
+    return metadata
+
+
+def load_stem_parts(doc, page):
+    """
+    Load the stem part index (see stem_parts) of a document page. It is computed once per page version and cached
+    like the metadata itself, the returned index must not be modified.
+
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    path, stat, _ = __stat(doc, page)
+    key = (path, stat.st_mtime_ns)
+    parts = stem_parts_cache.get(key)
+    if parts is None:
+        parts = stem_parts(load(doc, page)['stems'])
+        stem_parts_cache.put(key, parts)
+    return parts
+
+
+def load_box_index(doc, page):
+    """
+    Load the spatial index of the word boxes (see bounding_boxes.BoxIndex) of a document page. It is built once per
+    page version and cached like the metadata itself.
+
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    path, stat, _ = __stat(doc, page)
+    key = (path, stat.st_mtime_ns)
+    box_index = box_index_cache.get(key)
+    if box_index is None:
+        page_metadata = load(doc, page)
+        # pages imported before the reading order was stored get sorted here
+        box_index = bounding_boxes.BoxIndex(page_metadata['boxes'], page_metadata.get('order'))
+        box_index_cache.put(key, box_index)
+    return box_index
+
+
+def stem_parts(stems):
+    """
+    Index the parts of hyphenated stems, so query stems also match the terms of compound words by their parts
+
+    :param stems: page stems (stem => terms)
+    :return: dict of stem part => terms of the hyphenated stem (parts take precedence over equal page stems)
+    """
+    parts = {}
+    for stem, terms in stems.items():
+        if '-' in stem:
+            for part in stem.split('-'):
+                parts[part] = terms
+    return parts
+
+
+def as_dict(metadata):
+    """
+    :return: JSON serializable version of loaded page metadata for responses - without the reading order, which is
+             only used on the server
+    """
+    if isinstance(metadata, binary_metadata.BinaryPageMetadata):
+        return metadata.to_dict(order=False)
+    return {key: value for key, value in metadata.items() if key != 'order'}
+
+
+def write(doc, page, page_data, metadata_format=None):
+    """
+    Store the metadata of a document page in the configured format (config.metadata_format).
+    A file of the page in the other format is removed, so it is not served instead of the new one.
+    """
+    metadata_format = metadata_format or config.metadata_format
+    if metadata_format == 'binary':
+        suffix = binary_metadata.suffix
+        binary_metadata.write(page_path(doc, page, suffix), page_data)
+    else:
+        suffix = '.json'
+        with open(page_path(doc, page), 'w') as file:
+            json.dump(page_data, file)
+    for other_suffix in suffixes:
+        if other_suffix != suffix:
+            try:
+                os.remove(page_path(doc, page, other_suffix))
+            except FileNotFoundError:
+                pass
+
+
+def remove(doc, page):
+    for suffix in suffixes:
+        try:
+            os.remove(page_path(doc, page, suffix))
+        except OSError:
+            pass
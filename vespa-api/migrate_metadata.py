@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+
+import binary_metadata
+import bounding_boxes
+import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert page metadata files of an import output tree in place. '
+                                                 'Pages without a stored reading order get one.')
+    parser.add_argument('--folder', type=str, default=config.metadata_path,
+                        help=f'import output folder (default: {config.metadata_path})')
+    parser.add_argument('--to', type=str, choices=['binary', 'json'], default='binary',
+                        help='target metadata format (default: binary)')
+    parser.add_argument('--keep-source', action='store_true', help='keep the source files after conversion')
+    parser.add_argument('--reading-order', action='store_true',
+                        help='only add the reading order to pages without one, keeping their format '
+                             '(binary pages are rewritten in the current binary version)')
+    args = parser.parse_args()
+
+    source_suffix, target_suffix = ('.json', binary_metadata.suffix) if args.to == 'binary' \
+        else (binary_metadata.suffix, '.json')
+    source_suffixes = ['.json', binary_metadata.suffix] if args.reading_order else [source_suffix]
+    converted = 0
+    failed = 0
+    for doc in sorted(os.listdir(args.folder)):
+        doc_dir = f'{args.folder}/{doc}'
+        if not os.path.isdir(doc_dir):
+            continue
+        for file in sorted(os.listdir(doc_dir)):
+            page, suffix = os.path.splitext(file)
+            if suffix not in source_suffixes or not page.isdigit():
+                continue
+            try:
+                if args.reading_order:
+                    converted += add_reading_order(f'{doc_dir}/{page}', suffix)
+                else:
+                    convert_page(f'{doc_dir}/{page}', source_suffix, target_suffix, args.keep_source)
+                    converted += 1
+            except Exception as e:
+                print(f'Failed to convert {doc_dir}/{file}: {e}')
+                failed += 1
+        print(f'\033[KConverted {converted} pages ({failed} failed) - current document: {doc}', end='\r')
+    if args.reading_order:
+        print(f'\033[KAdded the reading order to {converted} pages ({failed} failed)')
+    else:
+        print(f'\033[KConverted {converted} pages to {args.to} ({failed} failed)')
+
+
+def convert_page(page_base_path, source_suffix, target_suffix, keep_source=False):
+    """
+    Convert a single page metadata file - the target file is written atomically.
+    A missing reading order is added on the way.
+    :param page_base_path: page file path without suffix
+    """
+    page_data = read_page(page_base_path, source_suffix)
+    if 'order' not in page_data:
+        page_data['order'] = bounding_boxes.reading_order(page_data['boxes'])
+    write_page(page_base_path, target_suffix, page_data)
+
+    if not keep_source:
+        os.remove(page_base_path + source_suffix)
+
+
+def add_reading_order(page_base_path, suffix):
+    """
+    Store the reading order of the page boxes (see bounding_boxes.reading_order) in a page metadata file,
+    so requests do not sort the boxes
+    :param page_base_path: page file path without suffix
+    :return: True if the page had no reading order yet
+    """
+    page_data = read_page(page_base_path, suffix)
+    if 'order' in page_data:
+        return False
+    page_data['order'] = bounding_boxes.reading_order(page_data['boxes'])
+    write_page(page_base_path, suffix, page_data)
+    return True
+
+
+def read_page(page_base_path, suffix):
+    if suffix == '.json':
+        with open(page_base_path + suffix, 'r') as file:
+            return json.load(file)
+    return binary_metadata.BinaryPageMetadata(page_base_path + suffix).to_dict()
+
+
+def write_page(page_base_path, suffix, page_data):
+    """
+    Write a page metadata file atomically
+    """
+    temp_path = page_base_path + suffix + '.tmp'
+    if suffix == '.json':
+        with open(temp_path, 'w') as file:
+            json.dump(page_data, file)
+    else:
+        binary_metadata.write(temp_path, page_data)
+    os.replace(temp_path, page_base_path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from io import BytesIO
+
+from PIL import Image
+
+import config
+
+suffix = '_tiles.bin'
+magic = b'AVPT'
+version = 1
+# magic, version, image mode, width, height, strip height, strip count
+header = struct.Struct('<4sI4s4I')
+
+
+def tiles_path(document_name, page):
+    return f'{config.metadata_path}/{document_name}/{page}{suffix}'
+
+
+def write(path, image: Image, strip_height=config.tile_strip_height, quality=config.tile_quality):
+    """
+    Store an image as horizontal strips of a fixed height in a single container file:
+    a fixed header followed by a uint64 offset table and the individually encoded strips.
+    The file is written atomically, so concurrent readers never see a partial container.
+
+    :param path: target file path
+    :param image: page image (usually the page thumbnail)
+    :param strip_height: height of each strip in pixels - multiples of 16 align with JPEG blocks
+    :param quality: JPEG quality of the encoded strips
+    """
+    strip_count = -(-image.height // strip_height)
+    offsets = array('Q', [header.size + 8 * (strip_count + 1)])
+    strips = []
+    for strip in range(strip_count):
+        buffer = BytesIO()
+        tile = image.crop((0, strip * strip_height, image.width, min(image.height, (strip + 1) * strip_height)))
+        tile.save(buffer, 'JPEG', quality=quality)
+        tile.close()
+        strips.append(buffer.getvalue())
+        offsets.append(offsets[-1] + len(strips[-1]))
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header.pack(magic, version, image.mode.encode().ljust(4), image.width, image.height,
+                               strip_height, strip_count))
+        file.write(offsets.tobytes())
+        for strip in strips:
+            file.write(strip)
+    os.replace(temp_path, path)
+
+
+class TiledImage:
+    """
+    Read-only view on a strip container file written by write().
+    Mimics the parts of PIL's Image used for snippet creation (width, height, crop, close),
+    but only decodes the strips intersecting a crop box instead of the whole image.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.__buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, file_version, mode, self.width, self.height, self.__strip_height, strip_count = \
+            header.unpack_from(self.__buffer)
+        if file_magic != magic or file_version != version:
+            self.__buffer.close()
+            raise ValueError(f'{path} is no page tile container (version {version})')
+        self.mode = mode.decode().strip()
+        self.__offsets = array('Q')
+        self.__offsets.frombytes(self.__buffer[header.size:header.size + 8 * (strip_count + 1)])
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def crop(self, box):
+        """
+        :param box: x1, y1, x2, y2 - rounded like PIL's Image.crop
+        :return: new PIL image of the box area
+        """
+        x1, y1, x2, y2 = (int(round(value)) for value in box)
+        cropped = Image.new(self.mode, (x2 - x1, y2 - y1))
+        first_strip = max(0, y1) // self.__strip_height
+        last_strip = (min(self.height, y2) - 1) // self.__strip_height
+        for strip in range(first_strip, last_strip + 1):
+            with Image.open(BytesIO(self.__buffer[self.__offsets[strip]:self.__offsets[strip + 1]])) as tile:
+                cropped.paste(tile, (-x1, strip * self.__strip_height - y1))
+        return cropped
+
+    def close(self):
+        self.__buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create missing page tile containers from the page thumbnails '
+                                                 'of an import output tree')
+    parser.add_argument('--folder', type=str, default=config.metadata_path,
+                        help=f'import output folder (default: {config.metadata_path})')
+    parser.add_argument('--force', action='store_true', help='rebuild existing tile containers')
+    args = parser.parse_args()
+
+    thumb_suffix = f'_thumb{config.convert_suffix}'
+    created = 0
+    failed = 0
+    for doc in sorted(os.listdir(args.folder)):
+        doc_dir = f'{args.folder}/{doc}'
+        if not os.path.isdir(doc_dir):
+            continue
+        files = set(os.listdir(doc_dir))
+        for file in sorted(files):
+            page = file[:-len(thumb_suffix)]
+            if not file.endswith(thumb_suffix) or not page.isdigit() \
+                    or (f'{page}{suffix}' in files and not args.force):
+                continue
+            try:
+                with Image.open(f'{doc_dir}/{file}') as thumb:
+                    write(f'{doc_dir}/{page}{suffix}', thumb)
+                created += 1
+            except Exception as e:
+                print(f'Failed to create tiles for {doc_dir}/{file}: {e}')
+                failed += 1
+        print(f'\033[KCreated {created} tile containers ({failed} failed) - current document: {doc}', end='\r')
+    print(f'\033[KCreated {created} tile containers ({failed} failed)')
+
+
+if __name__ == '__main__':
+    main()
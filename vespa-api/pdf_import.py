@@ -1,67 +1,228 @@
 from pdfminer.high_level import extract_pages
 from pdfminer.layout import LTPage, LTTextBox, LTTextLine, LTChar
-from pdf2image import convert_from_path
+from pdf2image import pdfinfo_from_path
+import bounding_boxes
 import config
 import sys
 import argparse
 import os
 from langdetect import detect, LangDetectException
+import itertools
+import metadata
+import page_tiles
 import stemmer
+from import_manifest import ImportManifest
+from rasterizer import PageRasterizer
+from feeder import BatchFeeder, FeedStats
 import vespa_util
 import time
 import json
 from shutil import copyfile
 import traceback
 from datetime import datetime
+from multiprocessing import Pool
 
 
 warnings = []
+feeder = None
 
 
 def main():
-    wait_for_vespa()
-
     parser = argparse.ArgumentParser()
     parser.add_argument("folder", type=str, help="the folder containing PDFs to import", default="data")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes importing pages in parallel (default: 1)")
+    parser.add_argument("--pages-per-task", type=int, default=config.import_pages_per_task,
+                        help="number of consecutive pages handed to a worker at once, 0 for whole documents "
+                             f"(default: {config.import_pages_per_task})")
     args = parser.parse_args()
+
+    start_time = time.time()
+    wait_for_vespa()
     files = find_files(args.folder)
 
     if not os.path.isdir(config.metadata_path):
         os.mkdir(config.metadata_path)
 
-    for (path, name) in progressBar(files, prefix="Importing", suffix="Completed", total=len(files)):
-        path_parts = path.split(os.sep)
-        collection = path_parts[1] if len(path_parts) > 2 else ''
-        doc_dir = f'{config.metadata_path}/{name}'
-        if not os.path.isfile(f'{config.metadata_path}/{name}.pdf'):
-            copyfile(path, f'{config.metadata_path}/{name}.pdf')
+    manifests = {name: prepare_document(path, name) for (path, name) in files}
+    tasks = build_import_tasks([(path, name, manifests[name]) for (path, name) in files], args.pages_per_task)
+    task_names = [__task_name(task) for task in tasks]
+    print(f'PDF Import - {len(tasks)} import tasks for {len(files)} files '
+          f'({sum(manifest.is_complete() for manifest in manifests.values())} files already imported)')
+    feed_stats = FeedStats()
+
+    if args.workers > 1:
+        with Pool(processes=args.workers) as pool:
+            # imap keeps the task order, so progress and warnings are merged exactly like in a serial run
+            results = pool.imap(import_task_worker, tasks)
+            for (task_warnings, imported_pages, task_feed_stats), task in zip(progressBar(
+                    results, prefix="Importing", suffix="Completed", total=len(tasks), names=task_names), tasks):
+                warnings.extend(task_warnings)
+                feed_stats.merge(task_feed_stats)
+                __record_imported_pages(manifests[task[1]], imported_pages)
+    else:
+        for task in progressBar(tasks, prefix="Importing", suffix="Completed", total=len(tasks), names=task_names):
+            __record_imported_pages(manifests[task[1]], import_pages(*task))
+        feed_stats.merge(get_feeder().pop_stats())
+
+    __write_warnings()
+    print(feed_stats.report(wall_time=time.time() - start_time))
+
+
+def get_feeder():
+    """
+    :return: The batch feeder of the current (worker) process
+    """
+    global feeder
+    if feeder is None:
+        feeder = BatchFeeder()
+    return feeder
+
+
+def prepare_document(path, name):
+    """
+    Copy the source PDF, create the output folder of a document and load or create its import manifest,
+    before any of its pages are imported. Changed source PDFs are detected via the manifest's content hash,
+    their page artifacts are removed and all pages are imported again.
+    :param path: Path to the PDF file
+    :param name: Document name used for the output folder and index entries
+    :return: ImportManifest of the document
+    """
+    doc_dir = f'{config.metadata_path}/{name}'
+    pdf_copy_path = f'{config.metadata_path}/{name}.pdf'
+    if not os.path.isdir(doc_dir):
+        os.mkdir(doc_dir)
+
+    manifest = ImportManifest.load(name)
+    source_changed = manifest is not None and not manifest.matches_source(path)
+    if manifest is not None and not source_changed and manifest.is_complete():
+        # Document already imported - Skip without touching the PDF!
+        return manifest
+
+    if source_changed or not os.path.isfile(pdf_copy_path):
+        copyfile(path, pdf_copy_path)
+
+    page_count = __page_count(path)
+    if manifest is None:
+        # first import, or output of an import run without manifests - adopt pages with complete artifacts
+        manifest = ImportManifest(name)
+        manifest.reset(path, page_count)
+        manifest.mark_done(__existing_pages(doc_dir))
+    elif source_changed:
+        print(f'\033[KSource file changed: {name} - Removing previously imported pages!')
+        __remove_page_artifacts(doc_dir)
+        manifest.reset(path, page_count)
+    else:
+        manifest.update_source_stat(path)
+        manifest.page_count = page_count
+    manifest.save()
+    return manifest
+
+
+def build_import_tasks(documents, pages_per_task):
+    """
+    Split the pending pages of documents into chunks, which can be imported independently of each other
+    :param documents: List of file path, document name and ImportManifest tuples
+    :param pages_per_task: Maximum number of pages per task, 0 to import documents as a whole
+    :return: List of (path, name, page numbers) tuples - the page numbers are None for whole documents
+    """
+    tasks = []
+    for path, name, manifest in documents:
+        pending_pages = manifest.pending_pages()
+        if pending_pages is None:
+            # unknown page count - let the import of the whole document fail and log the warning
+            tasks.append((path, name, None))
+        elif pages_per_task <= 0:
+            if pending_pages:
+                tasks.append((path, name, pending_pages))
+        else:
+            for i in range(0, len(pending_pages), pages_per_task):
+                tasks.append((path, name, pending_pages[i:i + pages_per_task]))
+    return tasks
+
+
+def __page_count(path):
+    try:
+        return pdfinfo_from_path(path)['Pages']
+    except Exception:
+        return None
 
-        if not os.path.isdir(doc_dir):
-            os.mkdir(doc_dir)
 
-        try:
-            for page_no, page_layout in enumerate(extract_pages(path)):
+def __existing_pages(doc_dir):
+    files = set(os.listdir(doc_dir))
+    pages = set()
+    for file in files:
+        page, suffix = os.path.splitext(file)
+        if suffix in metadata.suffixes and page.isdigit() \
+                and f'{page}{config.convert_suffix}' in files and f'{page}_thumb{config.convert_suffix}' in files:
+            pages.add(int(page))
+    return sorted(pages)
+
+
+def __remove_page_artifacts(doc_dir):
+    for file in os.listdir(doc_dir):
+        if file[0].isdigit():
+            __safe_remove(f'{doc_dir}/{file}')
+
+
+def __record_imported_pages(manifest, pages):
+    manifest.mark_done(pages)
+    manifest.save()
+
+
+def __task_name(task):
+    path, name, pages = task
+    if pages is None:
+        return name
+    return f'{name} (pages {pages[0] + 1}-{pages[-1] + 1})'
+
+
+def import_task_worker(task):
+    """
+    Process pool entry point: import a chunk of pages and hand the collected warnings back to the parent process
+    :param task: Tuple of file path, document name and page numbers
+    :return: List of warnings logged, list of pages imported successfully and feed stats of the task
+    """
+    warnings.clear()
+    imported_pages = import_pages(*task)
+    return list(warnings), imported_pages, get_feeder().pop_stats()
+
+
+def import_pages(path, name, pages=None):
+    """
+    Import pages of a PDF file: page images, thumbnails, page metadata and vespa index entries
+    :param path: Path to the PDF file
+    :param name: Document name used for the output folder and index entries
+    :param pages: Sorted list of (0-based) page numbers to import, None for all pages
+    :return: List of successfully imported page numbers
+    """
+    path_parts = path.split(os.sep)
+    collection = path_parts[1] if len(path_parts) > 2 else ''
+    doc_dir = f'{config.metadata_path}/{name}'
+    page_numbers = set(pages) if pages is not None else None
+    page_sequence = pages if pages is not None else itertools.count()
+    last_page = pages[-1] + 1 if pages else None
+    imported_pages = []
+
+    try:
+        with PageRasterizer(path, last_page=last_page) as rasterizer:
+            for page_no, page_layout in zip(page_sequence, extract_pages(path, page_numbers=page_numbers)):
                 try:
                     image_path = f'{doc_dir}/{page_no}{config.convert_suffix}'
                     thumb_path = f'{doc_dir}/{page_no}_thumb{config.convert_suffix}'
-                    json_path = f'{doc_dir}/{page_no}.json'
+                    tiles_path = f'{doc_dir}/{page_no}{page_tiles.suffix}'
 
                     if page_layout.width < 1500 or page_layout.height < 1500:
                         size = None
                     else:
                         size = (page_layout.width, page_layout.height)
-                    image = convert_from_path(path, first_page=page_no+1, last_page=page_no+1,
-                                              size=size)[0]
-                    if not os.path.isfile(image_path):
-                        image.save(image_path, config.convert_type)
-                    else:
-                        # Page already processed - Skip!
-                        continue
+                    image = rasterizer.page(page_no, size)
+                    image.save(image_path, config.convert_type)
 
                     thumb = image.copy()
-                    if not os.path.isfile(thumb_path):
-                        thumb.thumbnail((max(1500, page_layout.width*0.5), max(1500, page_layout.height*0.5)))
-                        thumb.save(thumb_path, config.convert_type)
+                    thumb.thumbnail((max(1500, page_layout.width*0.5), max(1500, page_layout.height*0.5)))
+                    thumb.save(thumb_path, config.convert_type)
+                    page_tiles.write(tiles_path, thumb)
 
                     text = page_layout.groups[0].get_text() if page_layout.groups else ''
                     page_id = f'{name}_{page_no}'
@@ -74,6 +235,8 @@ def main():
                         stems = {}
                     page_data = {
                         'boxes': boxes,
+                        # stored once, so requests do not sort the boxes
+                        'order': bounding_boxes.reading_order(boxes),
                         'stems': stems,
                         'dimensions': {
                             'scale': image.width / page_layout.width,
@@ -83,20 +246,31 @@ def main():
                         }
                     }
 
-                    with open(json_path, 'w') as file:
-                        json.dump(page_data, file)
-                    vespa_util.feed(page_id, name, page_no, collection, text)
+                    metadata.write(name, page_no, page_data)
+                    get_feeder().add(page_id, vespa_util.page_fields(name, page_no, collection, text))
+                    imported_pages.append(page_no)
                 except Exception as e:
                     print(f'\033[KFailed to import file: {name} | page: {page_no} - Cleaning up file artifacts!')
+                    __safe_remove(tiles_path)
                     __safe_remove(thumb_path)
                     __safe_remove(image_path)
-                    __safe_remove(json_path)
+                    metadata.remove(name, page_no)
                     __log_warning(e, file_name=name, page=page_no)
-        except Exception as e:
-            print(f'\033[KFailed to import file: {name}')
-            __log_warning(e, file_name=name)
+    except Exception as e:
+        print(f'\033[KFailed to import file: {name}')
+        __log_warning(e, file_name=name)
 
-    __write_warnings()
+    # pages only count as imported once their index entry was fed successfully
+    failed_ids = set(get_feeder().flush())
+    for page_no in [page_no for page_no in imported_pages if f'{name}_{page_no}' in failed_ids]:
+        print(f'\033[KFailed to feed file: {name} | page: {page_no} - see {config.feed_dead_letter_path}')
+        __log_warning(FeedException(f'Feeding page {page_no} failed'), file_name=name, page=page_no)
+        imported_pages.remove(page_no)
+    return imported_pages
+
+
+class FeedException(Exception):
+    pass
 
 
 def __log_warning(e: Exception, file_name, page=-1):
@@ -212,7 +386,8 @@ def find_files(folder, suffix=".pdf"):
     return matching_files
 
 
-def progressBar(iterable, total, prefix = '', suffix = '', decimals = 1, length = 100, fill = '█', printEnd = "\r"):
+def progressBar(iterable, total, prefix = '', suffix = '', decimals = 1, length = 100, fill = '█', printEnd = "\r",
+                names = None):
     """
     Call in a loop to create terminal progress bar
     @params:
@@ -224,14 +399,16 @@ def progressBar(iterable, total, prefix = '', suffix = '', decimals = 1, length
         length      - Optional  : character length of bar (Int)
         fill        - Optional  : bar fill character (Str)
         printEnd    - Optional  : end character (e.g. "\r", "\r\n") (Str)
+        names       - Optional  : names of the items shown as current item, in iteration order (List)
     """
     # Progress Bar Printing Function
     def printProgressBar (iteration):
-        percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(total)))
-        filledLength = int(length * iteration // total)
+        percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(total))) if total else "100.0"
+        filledLength = int(length * iteration // total) if total else length
         bar = fill * filledLength + '-' * (length - filledLength)
-        if iteration != len(iterable):
-            print(f'\033[K{prefix} (Current file: {iterable[iteration][1]}) | {iteration}/{total} ({percent}%) {suffix}\r', end = printEnd)
+        if iteration != total:
+            current = f' (Current file: {names[iteration]})' if names else ''
+            print(f'\033[K{prefix}{current} | {iteration}/{total} ({percent}%) {suffix}\r', end = printEnd)
         else:
             print(f'\033[K{prefix} DONE | {iteration}/{total} ({percent}%) {suffix}\r', end = printEnd)
     # Initial Call
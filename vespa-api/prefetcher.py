@@ -0,0 +1,54 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    Runs background tasks on a few dedicated threads. Tasks are dropped instead of queued, once max_pending tasks
+    are waiting or running, and tasks with a key already pending are skipped, so prefetching never piles up work or
+    occupies more than `workers` threads next to the foreground requests.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.max_pending = max_pending
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.__pending = set()
+        self.__lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+
+    def submit(self, key, func, *args):
+        """
+        :return: False if the task was dropped or a task with the same key is already pending
+        """
+        with self.__lock:
+            if key in self.__pending:
+                return False
+            if len(self.__pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.__pending.add(key)
+            self.submitted += 1
+        self.__executor.submit(self.__run, key, func, *args)
+        return True
+
+    def __run(self, key, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            print(''.join(traceback.format_exception(None, e, e.__traceback__)))
+            with self.__lock:
+                self.failed += 1
+        finally:
+            with self.__lock:
+                self.__pending.discard(key)
+
+    def stats(self):
+        return {
+            'pending': len(self.__pending),
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'failed': self.failed
+        }
@@ -0,0 +1,76 @@
+from tempfile import TemporaryDirectory
+
+from pdf2image import convert_from_path
+
+import config
+
+
+class PageRasterizer:
+    """
+    Renders the pages of a PDF document in chunks of consecutive pages, so poppler only has to be started
+    and the document parsed once per chunk instead of once per page.
+    Only the current chunk is kept, which bounds memory usage to chunk_size page images.
+    """
+
+    def __init__(self, path, chunk_size=config.raster_chunk_size, last_page=None, spool_to_disk=False):
+        """
+        :param path: Path to the PDF file
+        :param chunk_size: Number of pages rendered by a single poppler call
+        :param last_page: Exclusive upper bound of 0-based page numbers that will be requested (None for no bound)
+        :param spool_to_disk: Let poppler write the chunk to a temporary folder and load page images lazily from there
+        """
+        self.path = path
+        self.chunk_size = max(1, chunk_size)
+        self.last_page = last_page
+        self.spool_to_disk = spool_to_disk
+        self.__first_page = None
+        self.__size = None
+        self.__images = []
+        self.__output_folder = None
+
+    def page(self, page_no, size=None):
+        """
+        Get the image of a single page - pages should be requested in ascending order to benefit from chunking
+        :param page_no: 0-based page number
+        :param size: Target image size as passed to pdf2image (None for the default resolution)
+        :return: PIL image of the page
+        """
+        if not self.__is_cached(page_no, size):
+            self.__render_chunk(page_no, size)
+        return self.__images[page_no - self.__first_page]
+
+    def close(self):
+        for image in self.__images:
+            image.close()
+        self.__images = []
+        self.__first_page = None
+        if self.__output_folder is not None:
+            self.__output_folder.cleanup()
+            self.__output_folder = None
+
+    def __is_cached(self, page_no, size):
+        return self.__first_page is not None and size == self.__size and \
+            self.__first_page <= page_no < self.__first_page + len(self.__images)
+
+    def __render_chunk(self, page_no, size):
+        self.close()
+        last_page = page_no + self.chunk_size
+        if self.last_page is not None:
+            last_page = max(page_no + 1, min(last_page, self.last_page))
+
+        output_folder = None
+        if self.spool_to_disk:
+            self.__output_folder = TemporaryDirectory()
+            output_folder = self.__output_folder.name
+
+        # pdf2image page numbers are 1-based and inclusive
+        self.__images = convert_from_path(self.path, first_page=page_no + 1, last_page=last_page, size=size,
+                                          output_folder=output_folder)
+        self.__first_page = page_no
+        self.__size = size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
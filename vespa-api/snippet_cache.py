@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+import time
+from tempfile import NamedTemporaryFile
+
+import cache_util
+import config
+
+
+class SnippetCache:
+    """
+    Content-addressed cache of snippet images on disk, shared by all API workers.
+    Snippets are keyed by (document, page, snippet box, page image version), so identical crops are reused.
+    The modification time of a file doubles as its last access time: once the cache exceeds its byte limit,
+    the least recently used files are evicted.
+    """
+
+    def __init__(self, directory=config.snippet_dir, max_bytes=config.snippet_cache_max_bytes,
+                 low_watermark=config.snippet_cache_low_watermark, temp_max_age=config.snippet_temp_max_age,
+                 name='snippets'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_watermark = low_watermark
+        self.temp_max_age = temp_max_age
+        self.hits = 0
+        self.misses = 0
+        self.__size = None
+        self.__lock = threading.Lock()
+        cache_util.caches[name] = self
+
+    def key(self, doc, page, box, version):
+        """
+        :param version: version of the source image (e.g. its modification time)
+        :return: cache key, which is also the snippet id used by the /snippet/<snippet_id> endpoint
+        """
+        box = ','.join(f'{coordinate:.1f}' for coordinate in box)
+        return hashlib.sha1(f'{doc}|{page}|{box}|{version}'.encode()).hexdigest()
+
+    def path(self, key):
+        return f'{self.directory}/{key}{config.convert_suffix}'
+
+    def contains(self, key):
+        """
+        Check if a snippet is cached and mark it as recently used
+        """
+        try:
+            os.utime(self.path(key))
+            self.hits += 1
+            return True
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+    def put(self, key, snippet):
+        """
+        Store a snippet image - written to a temporary file first, so concurrent workers never serve partial files
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        with NamedTemporaryFile(mode='w+b', suffix='.tmp', delete=False, dir=self.directory) as temp_file:
+            snippet.save(temp_file, config.convert_type)
+        os.replace(temp_file.name, self.path(key))
+
+        # the directory is shared by all workers, so its size is scanned instead of counting the writes of this worker
+        size = self.__scan()[1]
+        with self.__lock:
+            self.__size = size
+        if size > self.max_bytes:
+            self.evict()
+
+    def evict(self, max_bytes=None):
+        """
+        Remove least recently used snippets until the cache is below its low watermark
+        and temporary files of writes that never finished
+        :param max_bytes: byte limit overriding the configured one (0 clears the cache)
+        :return: number of removed files
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries, size, stale_temp_files = self.__scan()
+        target = max_bytes * self.low_watermark
+        removed = 0
+        for path in stale_temp_files:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        if size > max_bytes:
+            for mtime, file_size, path in sorted(entries):
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    size -= file_size
+                    removed += 1
+                except OSError:
+                    pass
+        with self.__lock:
+            self.__size = size
+        return removed
+
+    def __scan(self):
+        """
+        :return: cached snippets as (mtime, size, path) tuples, their total size and stale temporary files
+        """
+        entries = []
+        size = 0
+        stale_temp_files = []
+        now = time.time()
+        try:
+            with os.scandir(self.directory) as files:
+                for file in files:
+                    try:
+                        stat = file.stat()
+                    except OSError:
+                        continue
+                    if file.name.endswith('.tmp'):
+                        # snippets being written by other workers - only removed once clearly abandoned
+                        if now - stat.st_mtime > self.temp_max_age:
+                            stale_temp_files.append(file.path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, file.path))
+                    size += stat.st_size
+        except FileNotFoundError:
+            pass
+        return entries, size, stale_temp_files
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'size': self.__size,
+            'maxSize': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': self.hits / requests if requests else 0.0
+        }
+
+
+cache = SnippetCache()
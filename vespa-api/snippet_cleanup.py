@@ -1,14 +1,17 @@
-import os
-import glob
+import argparse
+
 import config
+import snippet_cache
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Evict least recently used snippets from the snippet cache')
+    parser.add_argument('--all', action='store_true', help='remove all cached snippets')
+    args = parser.parse_args()
+
     print('Starting snippet cleanup!')
-    files = glob.glob(config.snippet_dir + '/*')
-    for f in files:
-        os.remove(f)
-        print(f'File \'{f}\' was removed')
+    removed = snippet_cache.cache.evict(max_bytes=0 if args.all else None)
+    print(f'{removed} snippets were removed from \'{config.snippet_dir}\'')
     print('Finished snippet cleanup!')
 
 
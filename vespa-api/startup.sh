@@ -6,4 +6,8 @@
 crontab cron_container.txt && cron
 
 # start api in foreground
-pipenv run gunicorn --config gunicorn.conf wsgi:app
\ No newline at end of file
+if [ "$API_MODE" = "async" ]; then
+  pipenv run hypercorn --bind "${GUNICORN_BIND:-0.0.0.0:5001}" async_app:app
+else
+  pipenv run gunicorn --config gunicorn.conf wsgi:app
+fi
\ No newline at end of file
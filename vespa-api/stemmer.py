@@ -1,6 +1,11 @@
+import threading
+
 import nltk
 from nltk.stem.snowball import SnowballStemmer
 
+import config
+from cache_util import LRUCache
+
 languages = {
     'de': 'german',
     'en': 'english',
@@ -16,13 +21,58 @@ languages = {
 }
 
 
+__stemmers = {}
+__stem_caches = {}
+__lock = threading.Lock()
+
+
+def resolve_language(language_code):
+    """
+    :return: language_code if a stemmer language is assigned to it, otherwise 'un'
+    """
+    return language_code if language_code in languages else 'un'
+
+
+def get_stemmer(language_code):
+    """
+    :return: shared stemmer instance and its stem cache of a language (unsupported languages share the english one)
+    """
+    language = languages[resolve_language(language_code)]
+    try:
+        return __stemmers[language], __stem_caches[language]
+    except KeyError:
+        with __lock:
+            if language not in __stemmers:
+                __stem_caches[language] = LRUCache(f'stems_{language}', config.stem_cache_size)
+                __stemmers[language] = SnowballStemmer(language=language)
+        return __stemmers[language], __stem_caches[language]
+
+
+def stem_words(words, language_code):
+    """
+    Stem every unique word once, previously stemmed words are served from a bounded per-language cache
+
+    :param words: iterable of words (may contain duplicates)
+    :param language_code: two-letter language code, unknown languages are stemmed as english
+    :return: dict of word => stem
+    """
+    stemmer, cache = get_stemmer(language_code)
+    stem_map = {}
+    for word in words:
+        if word in stem_map:
+            continue
+        stem = cache.get(word)
+        if stem is None:
+            stem = stemmer.stem(word)
+            cache.put(word, stem)
+        stem_map[word] = stem
+    return stem_map
+
+
 def map_stems_to_words(words, language_code):
-    if language_code not in languages:
-        language_code = 'un'
-    stemmer = SnowballStemmer(language=languages[language_code])
+    language_code = resolve_language(language_code)
     unique_stems = {}
-    for word in words:
-        stemmed_word = stemmer.stem(word)
+    for word, stemmed_word in stem_words(words, language_code).items():
         try:
             unique_stems[stemmed_word].add(word)
         except KeyError:
@@ -36,13 +86,7 @@ def map_stems_to_words(words, language_code):
 
 
 def map_words_to_stems(words, language_code):
-    if language_code not in languages:
-        language_code = 'un'
-    stemmer = SnowballStemmer(language=languages[language_code])
-    stem_map = {}
-    for word in words:
-        stem_map[word] = stemmer.stem(word)
-    return stem_map
+    return stem_words(words, language_code)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,4 @@
+from collections import deque
 
 
 def remove_parenthesis(text: str):
@@ -20,50 +21,125 @@ def remove_parenthesis(text: str):
 def contains_synonym(synonym: str, words: []):
     """
     Check if list of words contains a synonym string
+    (use a SynonymMatcher when checking multiple synonyms against the same words)
     :param synonym: str
     :param words: []
     :return:
     """
-    synonym_words = synonym.split(' ')
-    try:
-        index = words.index(synonym_words[0])
-        if synonym_words == words[index: index + len(synonym_words)]:
-            # full consecutive match in words
-            return True
-        else:
-            # check rest of text for synonym match
-            return contains_synonym(synonym, words[index+1])
-
-    except (IndexError, ValueError):
-        pass
-    return False
-
-
-def locate_synonym(synonym: str, words: [], locations=None, prevIndex=0):
+    return len(locate_synonym(synonym, words)) > 0
+
+
+def locate_synonym(synonym: str, words: []):
     """
     Return positions of parts of a fully matched synonym in a list of words
+    (use a SynonymMatcher when locating multiple synonyms in the same words)
 
-    :param locations: recursively processed list of found synonym locations
     :param synonym: synonym string to look for
     :param words: list of words to search
     """
-    if locations is None:
-        locations = set()
-
-    synonym_words = synonym.split(' ')
-    try:
-        index = words.index(synonym_words[0])
-        if synonym_words == words[index: index + len(synonym_words)]:
-            # full consecutive match in document
-            for i in range(index, index + len(synonym_words)):
-                locations.add(i + prevIndex)
-            locate_synonym(synonym, words[index + len(synonym_words):], locations, index + len(synonym_words) + prevIndex)
-        else:
-            # check rest of text for synonym match
-            locate_synonym(synonym, words[index+1], locations)
-    except (IndexError, ValueError):
-        return list(locations)
-    return list(locations)
+    matcher = SynonymMatcher()
+    matcher.add(synonym)
+    return sorted(matcher.locate(words))
+
+
+class SynonymMatcher:
+    """
+    Multi-word phrase matcher: an Aho-Corasick automaton over words instead of characters.
+    All added phrases are found in a single pass over a list of words, independent of the number of phrases.
+    """
+
+    def __init__(self):
+        # per state: transitions (word => state), failure state and phrases ending in the state
+        self.__transitions = [{}]
+        self.__failures = [0]
+        self.__outputs = [[]]
+        self.__match_outputs = [[]]
+        self.__built = True
+
+    def add(self, phrase, value=None):
+        """
+        :param phrase: space separated phrase string or sequence of words
+        :param value: value reported for matches of the phrase (Default: the phrase itself)
+        """
+        words = phrase.split(' ') if isinstance(phrase, str) else list(phrase)
+        if not words:
+            return
+        if value is None:
+            value = phrase if isinstance(phrase, str) else ' '.join(words)
+        state = 0
+        for word in words:
+            next_state = self.__transitions[state].get(word)
+            if next_state is None:
+                next_state = len(self.__transitions)
+                self.__transitions[state][word] = next_state
+                self.__transitions.append({})
+                self.__failures.append(0)
+                self.__outputs.append([])
+            state = next_state
+        if (len(words), value) not in self.__outputs[state]:
+            self.__outputs[state].append((len(words), value))
+        self.__built = False
+
+    def __build(self):
+        # breadth first, so failure states of shorter prefixes are known before they are needed
+        self.__failures = [0] * len(self.__transitions)
+        queue = deque(self.__transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.__transitions[state].items():
+                queue.append(next_state)
+                failure = self.__failures[state]
+                while failure and word not in self.__transitions[failure]:
+                    failure = self.__failures[failure]
+                failure = self.__transitions[failure].get(word, 0)
+                self.__failures[next_state] = failure if failure != next_state else 0
+        # outputs of a state include the outputs of its failure chain (phrases that are suffixes of it)
+        self.__match_outputs = [None] * len(self.__transitions)
+        self.__match_outputs[0] = self.__outputs[0]
+        queue = deque(self.__transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            self.__match_outputs[state] = self.__outputs[state] + self.__match_outputs[self.__failures[state]]
+            queue.extend(self.__transitions[state].values())
+        self.__built = True
+
+    def finditer(self, words):
+        """
+        Find all (possibly overlapping) occurrences of the added phrases
+
+        :param words: list of words to search
+        :return: generator of (start index, end index (exclusive), value) tuples, ordered by end index
+        """
+        if not self.__built:
+            self.__build()
+        transitions = self.__transitions
+        failures = self.__failures
+        match_outputs = self.__match_outputs
+        state = 0
+        for index, word in enumerate(words):
+            while state and word not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(word, 0)
+            for length, value in match_outputs[state]:
+                yield index + 1 - length, index + 1, value
+
+    def matches(self, words):
+        """
+        :return: set of values of all phrases contained in words
+        """
+        return {value for _, _, value in self.finditer(words)}
+
+    def locate(self, words):
+        """
+        :return: dict of word positions => list of values of the phrases covering the position
+        """
+        positions = {}
+        for start, end, value in self.finditer(words):
+            for position in range(start, end):
+                values = positions.setdefault(position, [])
+                if value not in values:
+                    values.append(value)
+        return positions
 
 
 def process_synonyms(synonyms):
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import api_handlers
+import bounding_boxes
+import config
+import metadata
+
+
+def page_boxes(lines=50):
+    # a dense page: one line of three words every 20 pixels
+    boxes = {}
+    for line in range(lines):
+        y = 20 * line
+        for column, word in enumerate(['alpha', 'beta', 'gamma']):
+            boxes.setdefault(word, []).append([100 * column, 100 * column + 80, y, y + 15])
+    return boxes
+
+
+def request(document, page, surrounding_box):
+    return {
+        'document': document,
+        'page': page,
+        'surrounding-box': surrounding_box,
+        'bounding-data': {
+            'boxes': page_boxes(),
+            'stems': {'alpha': ['alpha'], 'beta': ['beta'], 'gamma': ['gamma']},
+            'dimensions': {'scale': 1.0, 'thumbScale': 1.0, 'origWidth': 300, 'origHeight': 1000}
+        },
+        'meta-data': {
+            'translations': [{'stems': {'beta': {'languages': ['en']}}, 'languages': ['en'], 'synonyms': [],
+                              'stemMap': {}}]
+        },
+        'language': 'en',
+        'stem-filters': []
+    }
+
+
+class BoxIndexTest(unittest.TestCase):
+
+    def test_candidates(self):
+        boxes = page_boxes()
+        box_index = bounding_boxes.BoxIndex(boxes, bounding_boxes.reading_order(boxes))
+        region = [0, 300, 200, 275]
+        candidates = box_index.candidates(region)
+        self.assertEqual(len(candidates), 4 * 3)
+        self.assertEqual(candidates, [box for box in bounding_boxes.flatten_bounding_boxes(boxes)
+                                      if 199 <= box['box'][2] <= 276])
+        self.assertEqual(bounding_boxes.flatten_snippet_bounding_boxes(box_index, region),
+                         bounding_boxes.flatten_snippet_bounding_boxes(boxes, region))
+
+
+class BoundingBoxHandlerTest(unittest.TestCase):
+    """
+    /bounding-boxes/ requests naming a document and page query the cached box index of the page
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(config, 'metadata_path', directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        os.mkdir(f'{directory.name}/doc')
+        boxes = page_boxes()
+        metadata.write('doc', 1, {
+            'boxes': boxes,
+            'order': bounding_boxes.reading_order(boxes),
+            'stems': {'alpha': ['alpha'], 'beta': ['beta'], 'gamma': ['gamma']},
+            'dimensions': {'scale': 1.0, 'thumbScale': 1.0, 'origWidth': 300, 'origHeight': 1000}
+        }, 'json')
+
+    def render(self, data):
+        filter_outside_boxes = getattr(bounding_boxes, '__filter_outside_boxes')
+        with mock.patch.object(bounding_boxes, '__filter_outside_boxes', wraps=filter_outside_boxes) as spy:
+            response = api_handlers.bounding_box_html(data)
+        return response, len(spy.call_args.args[0])
+
+    def test_region_visits_only_its_boxes(self):
+        region = [0, 300, 200, 275]
+        indexed_response, indexed_visited = self.render(request('doc', 1, region))
+        posted_response, posted_visited = self.render(request(None, None, region))
+        self.assertEqual(indexed_response, posted_response)
+        self.assertEqual(indexed_visited, 4 * 3)
+        self.assertEqual(posted_visited, 50 * 3)
+
+    def test_cached_stem_parts(self):
+        with mock.patch.object(metadata, 'stem_parts', wraps=metadata.stem_parts) as spy:
+            for _ in range(3):
+                api_handlers.bounding_box_html(request('doc', 1, [0, 300, 200, 275]))
+            self.assertEqual(spy.call_count, 1)
+            api_handlers.bounding_box_html(request(None, None, [0, 300, 200, 275]))
+            self.assertEqual(spy.call_count, 2)
+
+    def test_missing_page_uses_posted_boxes(self):
+        _, visited = self.render(request('other-doc', 1, [0, 300, 200, 275]))
+        self.assertEqual(visited, 50 * 3)
+
+    def test_invalid_page(self):
+        for document, page in [('../doc', 1), ('.doc', 1), (['doc'], 1), ('doc', 'first')]:
+            with self.subTest(document=document, page=page):
+                with self.assertRaises(api_handlers.InvalidRequestException):
+                    api_handlers.bounding_box_html(request(document, page, [0, 300, 200, 275]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import bounding_boxes
+import config
+import metadata
+import vespa_util
+
+
+def page_data():
+    boxes = {
+        'heart': [[10, 60, 10, 20], [10, 60, 100, 110]],
+        'attack': [[70, 130, 10, 20]],
+        'acute': [[10, 50, 50, 60]]
+    }
+    return {
+        'boxes': boxes,
+        'order': bounding_boxes.reading_order(boxes),
+        'stems': {'heart': ['heart'], 'attack': ['attack'], 'acut': ['acute']},
+        'dimensions': {'scale': 2.0, 'thumbScale': 1.0, 'origWidth': 200, 'origHeight': 200}
+    }
+
+
+class PageResponseTest(unittest.TestCase):
+    """
+    The stored reading order is only used on the server and must not be part of /search/ or /document/ responses
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(config, 'metadata_path', directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        for doc, metadata_format in [('json-doc', 'json'), ('binary-doc', 'binary')]:
+            os.mkdir(f'{directory.name}/{doc}')
+            metadata.write(doc, 1, page_data(), metadata_format)
+
+    def test_page_data(self):
+        for doc in ['json-doc', 'binary-doc']:
+            with self.subTest(doc=doc):
+                data = vespa_util.page_data(doc, 1)
+                self.assertNotIn('order', json.loads(json.dumps(data)))
+                self.assertEqual(sorted(data['boxes']), ['acute', 'attack', 'heart'])
+                # the cached metadata keeps the order for the server
+                self.assertIn('order', metadata.load(doc, 1))
+
+    def test_search_bounding_data(self):
+        hits = [{'fields': {'parent_doc': doc, 'page': 1}} for doc in ['json-doc', 'binary-doc']]
+        for query_stems in [None, {'heart': {'languages': ['en']}}]:
+            with self.subTest(lean=query_stems is not None):
+                bounding_data = vespa_util.get_bounding_box_data(hits, query_stems, concurrent=False)
+                for doc in ['json-doc', 'binary-doc']:
+                    self.assertNotIn('order', json.loads(json.dumps(bounding_data[doc][1])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+import cache_util
+import vespa_util
+
+
+def processed_result(result, lean=False, concurrent=True):
+    return [], {'translations': []}, {}, 20
+
+
+class SingleUseCacheTest(unittest.TestCase):
+
+    def test_counts(self):
+        cache = cache_util.LRUCache('test-single-use', 2, single_use=True)
+        self.addCleanup(cache_util.caches.pop, 'test-single-use')
+        self.assertIsNone(cache.take('missing'))
+        cache.put('used', 1)
+        self.assertEqual(cache.take('used'), 1)
+        self.assertIsNone(cache.take('used'))
+        for key in ['evicted', 'unused', 'new']:
+            cache.put(key, 2)
+        stats = cache.stats()
+        # only the served entry is a hit and only the entry evicted unused a miss
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 2))
+
+
+class PrefetchTest(unittest.TestCase):
+    """
+    The synchronous and asyncio api share the cache lookup and prefetching of vespa_util.CachedSearch
+    """
+
+    def setUp(self):
+        for cache in [vespa_util.query_cache, vespa_util.prefetch_cache]:
+            cache.clear()
+            cache.hits = cache.misses = 0
+        for patch in [mock.patch.object(vespa_util, 'process_query_result', side_effect=processed_result),
+                      # prefetches run right away instead of on the prefetch threads
+                      mock.patch.object(vespa_util.prefetcher, 'submit',
+                                        side_effect=lambda key, func, *args: func(*args))]:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.query = mock.patch.object(vespa_util.client, 'query').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_prefetched_page(self):
+        vespa_util.query('heart attack', hits=5, page=0, prefetch='results')
+        self.assertEqual(self.query.call_count, 2)
+        # uncached searches without a prefetched page are no prefetch cache misses
+        self.assertEqual(vespa_util.prefetch_cache.stats()['misses'], 0)
+
+        search = vespa_util.CachedSearch('heart attack', hits=5, page=1)
+        self.assertIsNotNone(search.result)
+        self.assertEqual(search.finish()[3], 20)
+        self.assertEqual(self.query.call_count, 2)
+        self.assertEqual(vespa_util.prefetch_cache.stats()['hits'], 1)
+        self.assertEqual(len(vespa_util.prefetch_cache), 0)
+
+        # the served page moved to the result cache
+        vespa_util.query('heart attack', hits=5, page=1)
+        self.assertEqual(self.query.call_count, 2)
+        self.assertEqual(vespa_util.prefetch_cache.stats()['hits'], 1)
+
+    def test_uncached_search(self):
+        search = vespa_util.CachedSearch('heart attack', hits=5, page=2, lean=True, prefetch='results')
+        self.assertIsNone(search.result)
+        search.process(vespa_util.client.query(body=search.body))
+        search.finish()
+        # the next page got prefetched with the same arguments
+        self.assertEqual(self.query.call_count, 2)
+        self.assertIsNotNone(vespa_util.CachedSearch('heart attack', hits=5, page=3, lean=True).result)
+        self.assertIsNone(vespa_util.CachedSearch('heart attack', hits=5, page=3).result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import cache_util
+import snippet_cache
+
+
+class Snippet:
+
+    def __init__(self, size):
+        self.size = size
+
+    def save(self, file, image_type):
+        file.write(b'\0' * self.size)
+
+
+class SnippetCacheTest(unittest.TestCase):
+    """
+    All API workers share the snippet directory, so its byte limit holds across workers
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def directory_size(self):
+        return sum(os.path.getsize(f'{self.directory}/{name}') for name in os.listdir(self.directory))
+
+    def test_limit_across_workers(self):
+        workers = [snippet_cache.SnippetCache(self.directory, max_bytes=10000, low_watermark=0.5,
+                                              name=f'test-snippets-{i}') for i in range(4)]
+        for i in range(len(workers)):
+            self.addCleanup(cache_util.caches.pop, f'test-snippets-{i}')
+        for i in range(40):
+            worker = workers[i % len(workers)]
+            worker.put(worker.key('doc', i, [0, 100, 0, 100], 1), Snippet(1000))
+            self.assertLessEqual(self.directory_size(), 10000)
+        self.assertTrue(workers[0].contains(workers[0].key('doc', 39, [0, 100, 0, 100], 1)))
+        self.assertFalse(workers[0].contains(workers[0].key('doc', 0, [0, 100, 0, 100], 1)))
+
+    def test_in_progress_writes(self):
+        cache = snippet_cache.SnippetCache(self.directory, max_bytes=1000, name='test-snippets')
+        self.addCleanup(cache_util.caches.pop, 'test-snippets')
+        with open(f'{self.directory}/pending.tmp', 'wb') as file:
+            file.write(b'\0' * 5000)
+        cache.put(cache.key('doc', 1, [0, 100, 0, 100], 1), Snippet(500))
+        self.assertEqual(cache.stats()['size'], 500)
+        self.assertTrue(os.path.exists(f'{self.directory}/pending.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
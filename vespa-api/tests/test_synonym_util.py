@@ -0,0 +1,96 @@
+import unittest
+
+import synonym_util
+
+
+def words(text):
+    return text.split(' ')
+
+
+class SynonymMatcherTest(unittest.TestCase):
+
+    def test_empty_matcher(self):
+        matcher = synonym_util.SynonymMatcher()
+        self.assertEqual(list(matcher.finditer(words('heart attack'))), [])
+        self.assertEqual(matcher.matches(words('heart attack')), set())
+        self.assertEqual(matcher.locate(words('heart attack')), {})
+        self.assertEqual(matcher.locate([]), {})
+
+    def test_overlapping_phrases(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('acute heart')
+        matcher.add('heart attack')
+        self.assertEqual(list(matcher.finditer(words('acute heart attack'))),
+                         [(0, 2, 'acute heart'), (1, 3, 'heart attack')])
+        self.assertEqual(matcher.locate(words('acute heart attack')),
+                         {0: ['acute heart'], 1: ['acute heart', 'heart attack'], 2: ['heart attack']})
+
+    def test_prefix_and_suffix_phrases(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('heart')
+        matcher.add('heart attack')
+        matcher.add('attack')
+        self.assertEqual(matcher.locate(words('heart attack')),
+                         {0: ['heart', 'heart attack'], 1: ['heart attack', 'attack']})
+        self.assertEqual(matcher.matches(words('heart failure')), {'heart'})
+
+    def test_failed_partial_match(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('heart heart attack')
+        matcher.add('heart failure')
+        self.assertEqual(list(matcher.finditer(words('heart heart heart attack heart failure'))),
+                         [(1, 4, 'heart heart attack'), (4, 6, 'heart failure')])
+
+    def test_repeated_words(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('a a')
+        self.assertEqual([(start, end) for start, end, _ in matcher.finditer(words('a a a'))], [(0, 2), (1, 3)])
+        matcher.add('a a')
+        self.assertEqual(len(list(matcher.finditer(words('a a')))), 1)
+
+    def test_values(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('heart attack')
+        # stem combinations of a synonym are reported as the synonym itself
+        matcher.add(['hearts', 'attacked'], 'heart attack')
+        matcher.add(['cardiac', 'arrest'])
+        self.assertEqual(matcher.locate(words('hearts attacked heart attack')),
+                         {0: ['heart attack'], 1: ['heart attack'], 2: ['heart attack'], 3: ['heart attack']})
+        self.assertEqual(matcher.matches(words('sudden cardiac arrest')), {'cardiac arrest'})
+        matcher.add([])
+        self.assertEqual(matcher.matches([]), set())
+
+    def test_phrases_added_after_search(self):
+        matcher = synonym_util.SynonymMatcher()
+        matcher.add('heart')
+        self.assertEqual(matcher.matches(words('heart attack')), {'heart'})
+        matcher.add('attack')
+        self.assertEqual(matcher.matches(words('heart attack')), {'heart', 'attack'})
+
+
+class LocateSynonymTest(unittest.TestCase):
+    # results of the previous recursive implementation, for the cases it handled
+
+    def test_locate_synonym(self):
+        cases = [
+            ('heart attack', 'a heart attack and another heart attack', [1, 2, 5, 6]),
+            ('heart attack', 'heart attack', [0, 1]),
+            ('attack', 'attack on attack', [0, 2]),
+            ('heart attack', 'no match here', []),
+            ('myocardial infarction', 'acute myocardial infarction with myocardial infarction', [1, 2, 4, 5]),
+            ('a a', 'a a a a', [0, 1, 2, 3])
+        ]
+        for synonym, text, positions in cases:
+            with self.subTest(synonym=synonym, text=text):
+                self.assertEqual(synonym_util.locate_synonym(synonym, words(text)), positions)
+                self.assertEqual(synonym_util.contains_synonym(synonym, words(text)), bool(positions))
+        self.assertEqual(synonym_util.locate_synonym('heart', []), [])
+
+    def test_match_after_partial_match(self):
+        # the previous implementation stopped at the first partial match
+        self.assertEqual(synonym_util.locate_synonym('heart attack', words('heart failure and heart attack')), [3, 4])
+        self.assertTrue(synonym_util.contains_synonym('heart attack', words('heart failure and heart attack')))
+
+
+if __name__ == '__main__':
+    unittest.main()
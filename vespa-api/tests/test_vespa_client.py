@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+
+import httpx
+
+import vespa_client
+
+search_response = {'root': {'fields': {'totalCount': 0}, 'children': []}}
+
+
+def open_breaker():
+    """
+    :return: circuit breaker that lets the next request through as half open trial request
+    """
+    breaker = vespa_client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_trial_request(self):
+        breaker = open_breaker()
+        self.assertTrue(breaker.before_request())
+        with self.assertRaises(vespa_client.CircuitOpenException):
+            breaker.before_request()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertFalse(breaker.before_request())
+
+    def test_released_trial(self):
+        breaker = open_breaker()
+        self.assertTrue(breaker.before_request())
+        breaker.release_trial()
+        self.assertTrue(breaker.before_request())
+
+
+class VespaClientTest(unittest.TestCase):
+
+    def client(self, handler, breaker):
+        return vespa_client.VespaClient('http://vespa', 8080, max_retries=0, breaker=breaker,
+                                        transport=httpx.MockTransport(handler))
+
+    def test_trial_interrupted(self):
+        breaker = open_breaker()
+
+        def interrupt(request):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.client(interrupt, breaker).query({})
+        result = self.client(lambda request: httpx.Response(200, json=search_response), breaker).query({})
+        self.assertEqual(result.hits, [])
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_trial_too_many_redirects(self):
+        breaker = open_breaker()
+
+        def redirect(request):
+            raise httpx.TooManyRedirects('too many redirects', request=request)
+
+        with self.assertRaises(vespa_client.VespaClientException):
+            self.client(redirect, breaker).query({})
+        # the failed trial opens the circuit again, the next trial is let through after the reset timeout
+        self.assertEqual(breaker.failures, 2)
+        result = self.client(lambda request: httpx.Response(200, json=search_response), breaker).query({})
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(breaker.state, 'closed')
+
+
+class AsyncVespaClientTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_trial_cancelled(self):
+        breaker = open_breaker()
+        started = asyncio.Event()
+
+        async def hang(request):
+            started.set()
+            await asyncio.Event().wait()
+
+        client = vespa_client.AsyncVespaClient('http://vespa', 8080, breaker=breaker,
+                                               transport=httpx.MockTransport(hang))
+        query = asyncio.create_task(client.query({}))
+        await started.wait()
+        # e.g. the async server cancels the request of a disconnected client
+        query.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await query
+        await client.close()
+
+        async def respond(request):
+            return httpx.Response(200, json=search_response)
+
+        client = vespa_client.AsyncVespaClient('http://vespa', 8080, breaker=breaker,
+                                               transport=httpx.MockTransport(respond))
+        result = await client.query({})
+        await client.close()
+        self.assertEqual(result.hits, [])
+        self.assertEqual(breaker.state, 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+import config
+
+retry_status_codes = [429, 502, 503, 504]
+
+
+class VespaClientException(Exception):
+    pass
+
+
+class CircuitOpenException(VespaClientException):
+    pass
+
+
+class QueryResult:
+    """
+    Parsed response of the vespa search API
+    """
+
+    def __init__(self, json, status_code):
+        self.json = json
+        self.status_code = status_code
+
+    @property
+    def hits(self):
+        return self.json['root'].get('children', [])
+
+    @property
+    def number_documents_retrieved(self):
+        return self.json['root']['fields']['totalCount']
+
+
+class CircuitBreaker:
+    """
+    Fails fast after failure_threshold consecutive failed requests. After reset_timeout seconds a single trial
+    request is let through (half open): it closes the circuit on success and opens it again on failure.
+    """
+
+    def __init__(self, failure_threshold=config.vespa_breaker_threshold, reset_timeout=config.vespa_breaker_reset):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.rejected = 0
+        self.__opened_at = None
+        self.__trial_running = False
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.__opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.__opened_at >= self.reset_timeout else 'open'
+
+    def before_request(self):
+        """
+        :return: True if the request is the half open trial request - it must be ended with release_trial
+        :raises CircuitOpenException: if the circuit is open or a half open trial request is already running
+        """
+        with self.__lock:
+            if self.__opened_at is None:
+                return False
+            if time.monotonic() - self.__opened_at >= self.reset_timeout and not self.__trial_running:
+                self.__trial_running = True
+                return True
+            self.rejected += 1
+        raise CircuitOpenException('vespa circuit breaker is open')
+
+    def release_trial(self):
+        """
+        End a trial request without an outcome (e.g. a cancelled request), so the next request is let through
+        """
+        with self.__lock:
+            self.__trial_running = False
+
+    def record_success(self):
+        with self.__lock:
+            self.failures = 0
+            self.__opened_at = None
+            self.__trial_running = False
+
+    def record_failure(self):
+        with self.__lock:
+            self.failures += 1
+            if self.__trial_running or self.failures >= self.failure_threshold:
+                self.__opened_at = time.monotonic()
+            self.__trial_running = False
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutiveFailures': self.failures,
+            'rejected': self.rejected
+        }
+
+
+class _BaseClient:
+
+    def __init__(self, url, port, max_retries, backoff, breaker):
+        self.base_url = f'{url}:{port}'
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def _retry_delay(self, attempt, response=None, error=None):
+        """
+        :return: seconds to wait before the next attempt, None if the request must not be retried
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is None and response.status_code not in retry_status_codes:
+            return None
+        return self.backoff * 2 ** attempt
+
+    def _result(self, response):
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        try:
+            return QueryResult(response.json(), response.status_code)
+        except ValueError:
+            raise VespaClientException(f'invalid vespa response (status {response.status_code})')
+
+    @staticmethod
+    def _limits(pool_size):
+        return httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                            keepalive_expiry=config.vespa_keepalive_expiry)
+
+    @staticmethod
+    def _timeout(timeout):
+        return httpx.Timeout(timeout, connect=config.vespa_connect_timeout)
+
+    @classmethod
+    def _request_timeout(cls, timeout):
+        return cls._timeout(timeout) if timeout else httpx.USE_CLIENT_DEFAULT
+
+    def _failure(self, error):
+        self.breaker.record_failure()
+        return VespaClientException(f'vespa request failed: {error}')
+
+
+class VespaClient(_BaseClient):
+    """
+    Vespa search client with a pool of keep-alive connections, per-request timeouts, retries with exponential
+    backoff (connection errors, timeouts and overload responses) and a circuit breaker.
+    Thread-safe, a single instance is shared by all threads of a worker.
+    A custom httpx transport can be passed, e.g. httpx.MockTransport in tests.
+    """
+
+    def __init__(self, url=config.vespa_url, port=config.vespa_port, pool_size=config.vespa_pool_size,
+                 timeout=config.vespa_timeout, max_retries=config.vespa_max_retries, backoff=config.vespa_backoff,
+                 breaker=None, transport=None):
+        super().__init__(url, port, max_retries, backoff, breaker)
+        self.__client = httpx.Client(base_url=self.base_url, limits=self._limits(pool_size),
+                                     timeout=self._timeout(timeout), transport=transport)
+
+    def query(self, body, timeout=None):
+        """
+        :param body: vespa query API request body
+        :param timeout: overrides the client's read timeout (seconds) for this request
+        :raises VespaClientException: if vespa could not be reached (after retries) or the circuit breaker is open
+        """
+        trial = self.breaker.before_request()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = self.__client.post('/search/', json=body, timeout=self._request_timeout(timeout))
+                    error = None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                except httpx.HTTPError as e:
+                    # not worth a retry, e.g. too many redirects or an undecodable response
+                    raise self._failure(e)
+                delay = self._retry_delay(attempt, response, error)
+                if delay is None:
+                    if error is not None:
+                        raise self._failure(error)
+                    return self._result(response)
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            if trial:
+                # no-op if the outcome was recorded, otherwise the breaker would reject every later request
+                self.breaker.release_trial()
+
+    def health_check(self):
+        """
+        :return: True if the vespa application is up and running
+        """
+        try:
+            return self.__client.get('/ApplicationStatus').status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def close(self):
+        self.__client.close()
+
+
+class AsyncVespaClient(_BaseClient):
+    """
+    asyncio variant of VespaClient - many queries can be in flight concurrently within a single worker.
+    Must be used (and closed) within the event loop it was first used in.
+    """
+
+    def __init__(self, url=config.vespa_url, port=config.vespa_port, pool_size=config.vespa_pool_size,
+                 timeout=config.vespa_timeout, max_retries=config.vespa_max_retries, backoff=config.vespa_backoff,
+                 breaker=None, transport=None):
+        super().__init__(url, port, max_retries, backoff, breaker)
+        self.__client = httpx.AsyncClient(base_url=self.base_url, limits=self._limits(pool_size),
+                                          timeout=self._timeout(timeout), transport=transport)
+
+    async def query(self, body, timeout=None):
+        """
+        see VespaClient.query
+        """
+        trial = self.breaker.before_request()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.__client.post('/search/', json=body,
+                                                        timeout=self._request_timeout(timeout))
+                    error = None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                except httpx.HTTPError as e:
+                    # not worth a retry, e.g. too many redirects or an undecodable response
+                    raise self._failure(e)
+                delay = self._retry_delay(attempt, response, error)
+                if delay is None:
+                    if error is not None:
+                        raise self._failure(error)
+                    return self._result(response)
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            if trial:
+                # no-op if the outcome was recorded, otherwise the breaker would reject every later request
+                self.breaker.release_trial()
+
+    async def health_check(self):
+        try:
+            return (await self.__client.get('/ApplicationStatus')).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def close(self):
+        await self.__client.aclose()
@@ -1,23 +1,31 @@
 import socket
 import traceback
 
-import urllib3.exceptions
-from vespa.application import Vespa
 import json
 from langdetect import detect, LangDetectException
 import ast
 import bounding_boxes
+import cache_util
 import image_processing
+import metadata as page_metadata
 import stemmer
 import config
-import requests
+import vespa_client
 import synonym_util
 import itertools
+from concurrent.futures import ThreadPoolExecutor
+from prefetcher import Prefetcher
 
 url = config.vespa_url
 schema = "baseline"
 port = config.vespa_port
-app = Vespa(url, port)
+client = vespa_client.VespaClient(url, port)
+query_cache = cache_util.LRUCache('search_results', config.query_cache_size, ttl=config.query_cache_ttl)
+analysis_cache = cache_util.LRUCache('query_analysis', config.query_analysis_cache_size)
+prefetch_cache = cache_util.LRUCache('prefetched_results', config.prefetch_cache_size, ttl=config.query_cache_ttl,
+                                      single_use=True)
+prefetcher = Prefetcher(config.prefetch_workers, config.prefetch_max_pending)
+metadata_executor = ThreadPoolExecutor(max_workers=config.metadata_load_workers, thread_name_prefix='metadata')
 searchChain = "multilangchain"
 traceLevel = 0
 timeout = "5s"
@@ -31,7 +39,8 @@ class VespaTimeoutException(Exception):
     pass
 
 
-def query(query, hits=5, page=0, language='', document=None, order_by='', direction='desc', stem_filter=''):
+def query(query, hits=5, page=0, language='', document=None, order_by='', direction='desc', stem_filter='',
+          lean=False, prefetch=''):
     """
     Launch a query at the vespa search index
 
@@ -43,12 +52,137 @@ def query(query, hits=5, page=0, language='', document=None, order_by='', direct
     :param order_by: sort results alphabetically (alpha) or by ranking (default)
     :param direction: sort direction: asc | desc (default)
     :param stem_filter: JSON string of data structure describing language specific stems to be filtered
-    :return:
+    :param lean: only return dimensions and boxes of matched terms as bounding box data
+    :param prefetch: 'results' | 'snippets' - fetch the next result page (and build its snippets) in the background
+    :return: hits, query metadata, bounding box data and total hit count - results are cached (see query_key) and
+             must not be modified
+    """
+    search = CachedSearch(query, hits, page, language, document, order_by, direction, stem_filter, lean, prefetch)
+    if search.result is None:
+        try:
+            search.process(client.query(body=search.body))
+        except vespa_client.VespaClientException as e:
+            print(''.join(traceback.format_exception(None, e, e.__traceback__)))
+            raise VespaTimeoutException(e)
+    return search.finish()
+
+
+class CachedSearch:
+    """
+    Cache lookup, result processing and prefetching of a search (see query for the parameters), shared by query and
+    the asyncio api (async_app.py) - only the vespa request in between differs:
+    if result is None after construction, the result of querying body is passed to process, finish returns the result.
+    """
+
+    def __init__(self, query, hits=5, page=0, language='', document=None, order_by='', direction='desc',
+                 stem_filter='', lean=False, prefetch=''):
+        self.args = {'query': query, 'hits': hits, 'page': page, 'language': language, 'document': document,
+                     'order_by': order_by, 'direction': direction, 'stem_filter': stem_filter}
+        self.lean = lean
+        self.prefetch = prefetch
+        self.body = query_body(query, hits, page, language, document, order_by, direction, stem_filter)
+        self.key = query_key(self.body, lean)
+        self.result = cached_result(self.key)
+
+    def process(self, result):
+        """
+        :param result: vespa result of body
+        """
+        self.result = process_query_result(result, self.lean)
+        query_cache.put(self.key, self.result)
+
+    def finish(self):
+        """
+        :return: hits, query metadata, bounding box data and total hit count (see query)
+        """
+        if self.prefetch:
+            prefetch_next_page(self.result[3], lean=self.lean, prefetch=self.prefetch, **self.args)
+        return self.result
+
+
+def cached_result(key):
+    """
+    :return: cached or prefetched result of a search (see query_key), None if there is none
+    """
+    processed_result = query_cache.get(key)
+    if processed_result is None:
+        # prefetched pages move to the result cache when they are served, so the hit ratio of the prefetch cache is
+        # the share of prefetched pages that were used
+        processed_result = prefetch_cache.take(key)
+        if processed_result is not None:
+            query_cache.put(key, processed_result)
+    return processed_result
+
+
+def prefetch_next_page(total, query, hits=5, page=0, language='', document=None, order_by='', direction='desc',
+                       stem_filter='', lean=False, prefetch='results'):
+    """
+    Fetch the result page after page in the background (see query for the parameters). Nothing is fetched if there is
+    no next page, it is cached already, the vespa circuit breaker is not closed or the prefetcher is busy.
+
+    :param total: total hit count of the search
+    """
+    if (page + 1) * hits >= total or client.breaker.state != 'closed':
+        return
+    body = query_body(query, hits, page + 1, language, document, order_by, direction, stem_filter)
+    key = query_key(body, lean)
+    if query_cache.contains(key) or prefetch_cache.contains(key):
+        return
+    prefetcher.submit(key, __prefetch, body, key, lean, prefetch == 'snippets')
+
+
+def __prefetch(body, key, lean, snippets):
+    # metadata of prefetched pages is loaded on the prefetch thread, leaving the metadata pool to foreground requests
+    processed_result = process_query_result(client.query(body=body), lean, concurrent=False)
+    prefetch_cache.put(key, processed_result)
+    if snippets:
+        hits, query_metadata = processed_result[0], processed_result[1]
+        stems = {stem: values for phrase_translations in query_metadata['translations']
+                 for stem, values in phrase_translations['stems'].items()}
+        synonyms = [synonym for phrase_translations in query_metadata['translations']
+                    for synonym in phrase_translations['synonyms']]
+        for hit in hits:
+            # snippet images are cached on disk, the /snippets/ request of the frontend reuses them
+            build_query_snippets(hit, snippet_stems(stems, hit['fields']['language']), synonyms)
+
+
+def snippet_stems(stems, hit_language, stem_filters=()):
+    """
+    Select the query stems highlighted in the snippets of a hit. If any query stem is of the hit's language,
+    only stems of this language are kept.
+
+    :param stems: dict of query stems => terms and languages
+    :param hit_language: language of the hit
+    :param stem_filters: stems excluded by the user
+    :return: list of stems
+    """
+    # Remove translation artifacts
+    stems = {stem: value for stem, value in stems.items() if stem != ''}
+    languages = set([language for stem, value in stems.items() for language in value['languages']])
+    return [stem for stem, value in stems.items()
+            if stem not in stem_filters and
+            (hit_language not in languages or hit_language in value['languages'])]
+
+
+def query_key(body, lean=False):
+    """
+    Result cache key of a search: the normalized query (the yql covers phrases, filters and order), result window and
+    stem filter of the request body and the index generation, which changes whenever documents are fed
+    """
+    return body['yql'], body['hits'], body['offset'], body['stemFilter'], lean, \
+        cache_util.generation(config.index_generation_path)
+
+
+def query_body(query, hits=5, page=0, language='', document=None, order_by='', direction='desc', stem_filter=''):
+    """
+    Build the vespa query API request body of a search (see query for the parameters)
     """
     try:
         query_list = json.loads(query)
     except json.JSONDecodeError:
         query_list = [query]
+    # phrases only differing in whitespace are the same query
+    query_list = [' '.join(phrase.split()) if isinstance(phrase, str) else phrase for phrase in query_list]
 
     phrases = ''
 
@@ -72,43 +206,72 @@ def query(query, hits=5, page=0, language='', document=None, order_by='', direct
 
     yql = f'select * from sources * where {phrases} {language_and} {document_and} {order_clause};'
 
-    try:
-        result = app.query(body={
-            "traceLevel": traceLevel,
-            "searchChain": searchChain,
-            "hits": hits,
-            "offset": page * hits,
-            "timeout": timeout,
-            "yql": yql,
-            "presentation.format": renderer,
-            "stemFilter": stem_filter  # custom non-vespa searchChain-specific param
-        })
-    except requests.exceptions.RetryError as e:
-        print(''.join(traceback.format_exception(None, e, e.__traceback__)))
-        raise VespaTimeoutException(e)
+    return {
+        "traceLevel": traceLevel,
+        "searchChain": searchChain,
+        "hits": hits,
+        "offset": page * hits,
+        "timeout": timeout,
+        "yql": yql,
+        "presentation.format": renderer,
+        "stemFilter": stem_filter  # custom non-vespa searchChain-specific param
+    }
+
+
+def process_query_result(result, lean=False, concurrent=True):
+    """
+    Collect query terms, stems and bounding box data of a search result (CPU and disk bound)
 
-    query_metadata = result.json['root']['query-metadata']
-    for i, phrase_translations in enumerate(query_metadata['translations']):
-        multilang_terms = __collect_multilang_query_terms(phrase_translations)
-        multilang_stems = __collect_multilang_query_stems(phrase_translations)
-        multilang_stem_map = __collect_multilang_query_stem_map(phrase_translations)
-        query_metadata['translations'][i]['stems'] = multilang_stems
-        query_metadata['translations'][i]['stemMap'] = multilang_stem_map
-        query_metadata['translations'][i]['flatTerms'] = multilang_terms
+    :param result: vespa_client.QueryResult of the search
+    :param lean: only return dimensions and boxes of matched terms as bounding box data
+    :param concurrent: load the page metadata of the hits concurrently (see get_bounding_box_data)
+    :return: hits, query metadata, bounding box data and total hit count
+    """
     try:
+        query_metadata = result.json['root']['query-metadata']
+        for phrase_translations in query_metadata['translations']:
+            phrase_translations.update(analyze_phrase(phrase_translations))
+        if lean:
+            translations = query_metadata['translations']
+            bounding_box_data = get_bounding_box_data(
+                result.hits,
+                query_stems=[stem for phrase in translations for stem in phrase['stems'] if stem != ''],
+                synonyms=[synonym for phrase in translations for synonym in phrase['synonyms']],
+                concurrent=concurrent)
+        else:
+            bounding_box_data = get_bounding_box_data(result.hits, concurrent=concurrent)
         return result.hits, result.json['root']['query-metadata'], \
-               get_bounding_box_data(result.hits), result.number_documents_retrieved
+               bounding_box_data, result.number_documents_retrieved
     except KeyError as e:
         print(''.join(traceback.format_exception(None, e, e.__traceback__)))
         raise VespaTimeoutException(e)
 
 
-def get_bounding_box_data(hits):
+def get_bounding_box_data(hits, query_stems=None, synonyms=None, concurrent=True):
+    """
+    Collect the page metadata of all hits. Pages of hits that could not be loaded are left out.
+
+    :param hits: vespa hits
+    :param query_stems: if passed, only dimensions and boxes of terms matching these stems (or the synonyms)
+                        are included (lean mode) - full page data can be fetched via query_doc_page
+    :param synonyms: data structure with synonyms matching the query (lean mode)
+    :param concurrent: load the pages concurrently in the metadata thread pool
+    :return: dict of page metadata by document and page
+    """
+    # hits of the same page (e.g. grouped results) are only loaded once
+    pages = list(dict.fromkeys((hit['fields']['parent_doc'], hit['fields']['page']) for hit in hits))
+    if concurrent and len(pages) > 1:
+        futures = [metadata_executor.submit(__page_box_data, doc, page, query_stems, synonyms) for doc, page in pages]
+    else:
+        futures = None
+
     bounding_boxes = {}
-    for hit in hits:
-        doc = hit['fields']['parent_doc']
-        page = hit['fields']['page']
-        box_data = __load_meta(doc, page)
+    for i, (doc, page) in enumerate(pages):
+        try:
+            box_data = futures[i].result() if futures else __page_box_data(doc, page, query_stems, synonyms)
+        except (OSError, ValueError) as e:
+            print(f'Failed to load metadata of page {page} of {doc}: {e!r}')
+            continue
         try:
             bounding_boxes[doc][page] = box_data
         except KeyError:
@@ -117,32 +280,82 @@ def get_bounding_box_data(hits):
     return bounding_boxes
 
 
-def query_doc_page(doc, page):
-    try:
-        meta = __load_meta(doc, page)
-        yql = f'select * from sources * where parent_doc matches \"{doc}\" and page matches \"{page}\";'
+def __page_box_data(doc, page, query_stems, synonyms):
+    metadata = page_metadata.load(doc, page)
+    if query_stems is None:
+        return page_metadata.as_dict(metadata)
+    return __lean_page_data(doc, page, metadata, query_stems, synonyms or [])
+
 
-        result = app.query(body={
-            "traceLevel": traceLevel,
-            "searchChain": searchChain,
-            "timeout": timeout,
-            "yql": yql,
-            "presentation.format": renderer
-        })
+def __lean_page_data(doc, page, metadata, query_stems, synonyms):
+    relevant_terms = get_relevant_terms(query_stems, metadata['stems'], page_metadata.load_stem_parts(doc, page))
+    terms = list(relevant_terms.keys())
+    if synonyms:
+        # synonyms can be phrases, which are highlighted word by word
+        terms += [word for synonym in find_relevant_synonym_terms(page_metadata.load_box_index(doc, page),
+                                                                  metadata['stems'], synonyms)
+                  for word in synonym.split(' ')]
 
+    stems = {}
+    for term, stem in relevant_terms.items():
+        stems.setdefault(stem, []).append(term)
+    return {
+        'boxes': {term: metadata['boxes'][term] for term in terms if term in metadata['boxes']},
+        'stems': stems,
+        'dimensions': dict(metadata['dimensions']),
+        'lean': True
+    }
+
+
+def page_etag(doc, page):
+    """
+    Entity tag of a page's metadata, changes whenever the page gets re-imported
+
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    return page_metadata.etag(doc, page)
+
+
+def page_data(doc, page):
+    """
+    :return: metadata (bounding box data) of a page
+    :raises FileNotFoundError: if the page has no metadata
+    """
+    return page_metadata.as_dict(page_metadata.load(doc, page))
+
+
+def query_doc_page(doc, page):
+    try:
+        meta = page_data(doc, page)
+        result = client.query(body=doc_page_query_body(doc, page))
         return result.hits[0], meta
     except (FileNotFoundError, IndexError):
         raise FileNotFoundError
+    except vespa_client.VespaClientException as e:
+        raise VespaTimeoutException(e)
+
 
+def doc_page_query_body(doc, page):
+    yql = f'select * from sources * where parent_doc matches \"{doc}\" and page matches \"{page}\";'
+    return {
+        "traceLevel": traceLevel,
+        "searchChain": searchChain,
+        "timeout": timeout,
+        "yql": yql,
+        "presentation.format": renderer
+    }
 
-def build_query_snippets(hit, stems, synonyms):
+
+def build_query_snippets(hit, stems, synonyms, inline_encoding=None):
     """
     Build query snippets of a specific document page containing search query items or any matching synonyms
 
     :param hit: vespa hit data of the document page
     :param stems: stemmed query terms
     :param synonyms: data structure with synonyms matching the query
-    :return: dict containing file paths to snippet images and bounding box data
+    :param inline_encoding: tuple of image format and quality - if passed, snippets are returned as data URIs
+                            in 'images' instead of being stored as files
+    :return: dict containing file paths to snippet images (or inline images) and bounding box data
     """
     snippet_data = {}
     doc = hit['fields']['parent_doc']
@@ -150,85 +363,104 @@ def build_query_snippets(hit, stems, synonyms):
     relevant_stem_terms = __get_relevant_stem_terms(doc, page, stems)
     relevant_synonym_terms = __get_relevant_synonym_terms(doc, page, synonyms)
     relevant_terms = relevant_stem_terms + relevant_synonym_terms
-    hit_snippets_names, hit_snippets_boxes, box_data = image_processing.build_snippets(doc, page, relevant_terms)
+    if inline_encoding:
+        hit_snippets_images, hit_snippets_boxes, box_data = \
+            image_processing.build_inline_snippets(doc, page, relevant_terms, *inline_encoding)
+        page_snippets = {'names': [], 'images': hit_snippets_images, 'boxes': hit_snippets_boxes}
+    else:
+        hit_snippets_names, hit_snippets_boxes, box_data = image_processing.build_snippets(doc, page, relevant_terms)
+        page_snippets = {'names': hit_snippets_names, 'boxes': hit_snippets_boxes}
     try:
-        snippet_data[doc][page] = {'names': hit_snippets_names, 'boxes': hit_snippets_boxes}
+        snippet_data[doc][page] = page_snippets
     except KeyError:
         snippet_data[doc] = {}
-        snippet_data[doc][page] = {'names': hit_snippets_names, 'boxes': hit_snippets_boxes}
+        snippet_data[doc][page] = page_snippets
     return snippet_data
 
 
-def __collect_multilang_query_terms(translations):
-    terms = set()
-    for translation in translations['translations']:
-        for term in translation['content']:
-            terms.add(term.lower())
-    return list(terms)
+def analyze_phrase(phrase_translations):
+    """
+    Collect the stems (stem => terms and languages), stem map (term => stem) and flat terms (lower case) of all
+    translations of a query phrase in a single pass, every word is stemmed once per language.
+    Analyses are cached by the translations of the phrase and must not be modified.
 
+    :param phrase_translations: query metadata of a phrase, containing its translations
+    :return: dict with the stems, stemMap and flatTerms of the phrase
+    """
+    key = tuple((translation['languageCode'], tuple(translation['content']))
+                for translation in phrase_translations['translations'])
+    analysis = analysis_cache.get(key)
+    if analysis is not None:
+        return analysis
 
-def __collect_multilang_query_stems(translations):
     stems = {}
-    for translation in translations['translations']:
-        for stem, values in stemmer.map_stems_to_words(translation['content'], translation['languageCode']).items():
-            if stem in stems:
-                stems[stem]['terms'] = list(set(values['terms'] + stems[stem]['terms']))
-                stems[stem]['languages'] = list(set(values['languages'] + stems[stem]['languages']))
+    stem_map = {}
+    terms = {}
+    for language_code, words in key:
+        language_code = stemmer.resolve_language(language_code)
+        for word, stem in stemmer.stem_words(words, language_code).items():
+            values = stems.get(stem)
+            if values is None:
+                stems[stem] = {'terms': [word], 'languages': [language_code]}
             else:
-                stems[stem] = values
-    return stems
-
-
-def __collect_multilang_query_stem_map(translations):
-    stems = {}
-    for translation in translations['translations']:
-        stems.update(stemmer.map_words_to_stems(translation['content'], translation['languageCode']))
-    return stems
+                if word not in values['terms']:
+                    values['terms'].append(word)
+                if language_code not in values['languages']:
+                    values['languages'].append(language_code)
+            stem_map[word] = stem
+        for word in words:
+            # dict as insertion ordered set
+            terms[word.lower()] = None
+    analysis = {'stems': stems, 'stemMap': stem_map, 'flatTerms': list(terms)}
+    analysis_cache.put(key, analysis)
+    return analysis
 
 
 def __get_relevant_stem_terms(doc, page, stems):
-    metadata = __load_meta(doc, page)
-    return list(get_relevant_terms(stems, metadata['stems']).keys())
+    metadata = page_metadata.load(doc, page)
+    return list(get_relevant_terms(stems, metadata['stems'], page_metadata.load_stem_parts(doc, page)).keys())
 
 
-def get_relevant_terms(query_stems, page_stems):
-    page_stems = __extend_multipart_stems(page_stems)
+def get_relevant_terms(query_stems, page_stems, stem_parts=None):
+    """
+    :param query_stems: iterable of query stems
+    :param page_stems: page stems (stem => terms)
+    :param stem_parts: stem part index of the page (see metadata.stem_parts), computed from page_stems if not passed
+    :return: dict of page terms matching a query stem => query stem
+    """
+    if stem_parts is None:
+        stem_parts = page_metadata.stem_parts(page_stems)
     relevant_terms_map = {}
     for stem in query_stems:
-        if stem in page_stems:
-            for term in page_stems[stem]:
-                relevant_terms_map[term] = stem
+        terms = stem_parts.get(stem)
+        if terms is None:
+            terms = page_stems.get(stem, ())
+        for term in terms:
+            relevant_terms_map[term] = stem
     return relevant_terms_map
 
 
-def __extend_multipart_stems(stems: dict):
-    extended_stems = stems.copy()
-    for stem, terms in stems.items():
-        if '-' in stem:
-            parts = stem.split('-')
-            for part in parts:
-                extended_stems[part] = terms
-    return extended_stems
-
-
 def __get_relevant_synonym_terms(doc, page, synonyms):
-    metadata = __load_meta(doc, page)
-    return find_relevant_synonym_terms(metadata['boxes'], metadata['stems'], synonyms)
+    metadata = page_metadata.load(doc, page)
+    return find_relevant_synonym_terms(page_metadata.load_box_index(doc, page), metadata['stems'], synonyms)
 
 
 def find_relevant_synonym_terms(boxes, page_stems, synonyms):
     """
     Sorts words contained in provided box data and finds full synonym matches in sorted text and stem mappings
 
-    :param boxes: dict of bounding boxes with text data
+    :param boxes: dict of bounding boxes with text data or bounding_boxes.BoxIndex of the page
     :param page_stems: stemmed terms of boxed words
     :param synonyms: dict of synonyms (mainTerm => [terms])
     :return: list of relevant synonym terms
     """
-    page_words = [box['word'] for box in bounding_boxes.flatten_bounding_boxes(boxes)]
+    flat_boxes = boxes.flat_boxes if isinstance(boxes, bounding_boxes.BoxIndex) \
+        else bounding_boxes.flatten_bounding_boxes(boxes)
+    page_words = [box['word'] for box in flat_boxes]
     synonyms = [item['terms'] + [item['mainTerm']] for item in synonyms if item['mainTerm'] != '']
     processed_synonyms = []
     relevant_synonyms = []
+    matcher = synonym_util.SynonymMatcher()
 
     for synonym_list in synonyms:
         for synonym in synonym_list:
@@ -238,13 +470,14 @@ def find_relevant_synonym_terms(boxes, page_stems, synonyms):
             for term in synonym.split('/'):
                 # split synonyms containing slashes into separate terms
                 processed_synonyms.append(term)
+                matcher.add(term)
             # check for occasional stem synonym overlap and match
             if synonym in page_stems:
                 relevant_synonyms.extend(page_stems[synonym])
 
-    for synonym in processed_synonyms:
-        if synonym_util.contains_synonym(synonym, page_words):
-            relevant_synonyms.append(synonym)
+    # single pass over the page words for all synonyms
+    matched_synonyms = matcher.matches(page_words)
+    relevant_synonyms.extend(synonym for synonym in processed_synonyms if synonym in matched_synonyms)
     return relevant_synonyms
 
 
@@ -255,32 +488,27 @@ def find_relevant_synonym_positions(words, synonyms, stems):
         :param words: list of words
         :param synonyms: dict of synonyms (mainTerm => [terms])
         :param stems: dict of stems mapping to words
-        :return: list of indices containing relevant synonym words
+        :return: dict of indices containing relevant synonym words => list of matched synonyms
     """
     synonyms = [item['terms'] + [item['mainTerm']] for item in synonyms if item['mainTerm'] != '']
     processed_synonyms = synonym_util.process_synonyms(synonyms)
-    position_map = {}
+    matcher = synonym_util.SynonymMatcher()
 
     for synonym in processed_synonyms:
-        for position in synonym_util.locate_synonym(synonym, words):
-            __add_or_create_dict_list(position_map, position, synonym)
+        matcher.add(synonym)
         try:
             # try to find synonym in stems
-            inverse_stems = __combine_inverse_synonym_stems(stems, synonym)
-            for stem_combo in inverse_stems:
-                for position in synonym_util.locate_synonym(' '.join(stem_combo), words):
-                    __add_or_create_dict_list(position_map, position, synonym)
+            for stem_combo in __combine_inverse_synonym_stems(stems, synonym):
+                matcher.add(stem_combo, synonym)
         except (KeyError, ValueError):
             pass
-    return position_map
-
 
-def __add_or_create_dict_list(dictionary, key, item):
-    try:
-        if item not in dictionary[key]:
-            dictionary[key].append(item)
-    except KeyError:
-        dictionary[key] = [item]
+    position_map = matcher.locate(words)
+    # list synonyms of a position in synonym order, regardless of where on the page they matched
+    synonym_order = {synonym: i for i, synonym in reversed(list(enumerate(processed_synonyms)))}
+    for position_synonyms in position_map.values():
+        position_synonyms.sort(key=synonym_order.get)
+    return position_map
 
 
 def __combine_inverse_synonym_stems(stems, synonym):
@@ -288,51 +516,34 @@ def __combine_inverse_synonym_stems(stems, synonym):
     return list(itertools.product(*stems_synonym))
 
 
-def __load_meta(doc, page):
-    doc_dir = f'{config.metadata_path}/{doc}'
-    with open(f'{doc_dir}/{page}.json', 'r') as file:
-        metadata = json.load(file)
-        return metadata
-
-
-def feed(id: str, parent_doc: str, page: str, collection: str, content: str):
+def page_fields(parent_doc: str, page: str, collection: str, content: str):
     """
-    Feed content into the vespa search engine
+    Build the index fields of a document page
 
-    :param id: desired id
     :param parent_doc: name of parent document (for single page processing)
     :param page: page number (for single page processing)
     :param collection: name of collection this document is part of
     :param content: string content intended for indexing
+    :return: dict of vespa document fields
     """
     try:
         language = detect(content)
     except LangDetectException:
         language = ''
-    response = app.feed_data_point(
-        schema="baseline",
-        data_id=str(id),
-        fields={
-            "language": language,
-            "parent_doc": parent_doc,
-            "page": page,
-            "collection": collection,
-            "body": content
-        }
-    )
-
-    if response.status_code >= 400:
-        print(response.status_code, response.json, end="\n")
+    return {
+        "language": language,
+        "parent_doc": parent_doc,
+        "page": page,
+        "collection": collection,
+        "body": content
+    }
 
 
 def health_check():
     """
     Checks if vespa search engine application is up and running
     """
-    try:
-        return requests.get(f'{url}:{port}/ApplicationStatus').status_code == 200
-    except Exception:
-        return False
+    return client.health_check()
 
 
 if __name__ == '__main__':
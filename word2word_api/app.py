@@ -1,9 +1,13 @@
+import logging
+
 from flask import Flask, request, abort
 
 app = Flask(__name__)
 import translate as translate_util
 import synonyms as synonyms_util
 
+logging.basicConfig(level=translate_util.config.get('log-level', 'INFO'))
+
 
 @app.route('/')
 def hello_world():
@@ -19,24 +23,44 @@ def multi_translate():
                 body['sourceLanguage'],
                 body['content']
             )
+            return __multi_translation(body['sourceLanguage'], body['content'], translations)
+        except KeyError:
+            pass
+    # bad request if content type not JSON or missing/wrong JSON fields
+    abort(400)
 
-            if body['sourceLanguage'] == 'en':
-                terms = body['content']
-            else:
-                terms = translate_util.get_translated_terms(translations, 'en')
 
+@app.route('/multilang-translate/batch', methods=['POST'])
+def multi_translate_batch():
+    if request.is_json:
+        body = request.json
+        try:
+            queries = [(query['sourceLanguage'], query['content']) for query in body['queries']]
+            batch_translations = translate_util.multilang_batch_translate(queries)
             return {
-                "sourceLanguage": body['sourceLanguage'],
-                "languages": translate_util.get_supported_languages(),
-                "translations": translations,
-                "synonyms": synonyms_util.find_synonyms(terms)
+                'results': [__multi_translation(source, content, translations)
+                            for (source, content), translations in zip(queries, batch_translations)]
             }
-        except KeyError:
+        except (KeyError, TypeError):
             pass
     # bad request if content type not JSON or missing/wrong JSON fields
     abort(400)
 
 
+def __multi_translation(source, content, translations):
+    if source == 'en':
+        terms = content
+    else:
+        terms = translate_util.get_translated_terms(translations, 'en')
+
+    return {
+        "sourceLanguage": source,
+        "languages": translate_util.get_supported_languages(),
+        "translations": translations,
+        "synonyms": synonyms_util.find_synonyms(terms)
+    }
+
+
 @app.route('/translate', methods=['POST'])
 def translate():
     if request.is_json:
@@ -59,3 +83,8 @@ def supported_languages():
     return {
         'languages': translate_util.supported_languages
     }
+
+
+@app.route('/cache-stats')
+def cache_stats():
+    return translate_util.cache_stats()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+import synonyms
+
+
+def benchmark_synonyms(args):
+    """
+    Compare the regex scan over all main terms with the synonym index on a generated synonym file
+    """
+    generator = random.Random(42)
+    vocabulary = [''.join(generator.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(generator.randint(3, 10)))
+                  for _ in range(max(1, args.entries // 2))]
+    with TemporaryDirectory() as tmp_dir:
+        path = f'{tmp_dir}/synonyms.tsv'
+        with open(path, 'w') as file:
+            for _ in range(args.entries):
+                main_term = ' '.join(generator.choice(vocabulary) for _ in range(generator.randint(1, 3)))
+                file.write('\t'.join([main_term] + generator.sample(vocabulary, 3)) + '\n')
+
+        start = time.perf_counter()
+        index = synonyms.load_index(path)
+        print(f'{args.entries} synonym entries | index build: {time.perf_counter() - start:.2f}s')
+
+    queries = [[generator.choice(vocabulary) for _ in range(generator.randint(1, 5))] for _ in range(args.queries)]
+
+    def find_regex(term_list):
+        # previous approach: one regex search per main term
+        terms = ' '.join(term_list)
+        return [main_term for main_term in index.synonym_map if re.search(r'\b' + main_term, terms) is not None]
+
+    def find_index(term_list):
+        return index.find(' '.join(term_list))
+
+    baseline = None
+    results = {}
+    for label, find in [('regex scan', find_regex), ('index', find_index)]:
+        start = time.perf_counter()
+        results[label] = [find(query) for query in queries]
+        duration = time.perf_counter() - start
+        speedup = f' | speedup x{baseline / duration:.0f}' if baseline else ''
+        print(f'{label:>12}: {duration:8.2f}s total | {1000 * duration / len(queries):8.3f}ms per query{speedup}')
+        baseline = baseline or duration
+    assert results['regex scan'] == results['index'], 'regex scan and index found different main terms'
+    print(f'{"":>12}  both found {sum(len(result) for result in results["index"])} main terms')
+
+
+# measured in a fresh interpreter each, reports seconds until the module is ready and after a first query,
+# resident and private (not shared with other workers) memory in MiB
+__startup_script = """
+import json, time
+start = time.perf_counter()
+{setup}
+ready = time.perf_counter() - start
+{query}
+first_query = time.perf_counter() - start
+memory = {{}}
+with open('/proc/self/smaps_rollup', 'r') as file:
+    for line in file:
+        if line.rstrip().endswith('kB'):
+            name, value = line.split(':', 1)
+            memory[name] = int(value.split()[0]) / 1024
+print(json.dumps({{'ready': ready, 'firstQuery': first_query, 'rss': memory['Rss'],
+                  'private': memory['Private_Clean'] + memory['Private_Dirty']}}))
+"""
+
+
+def benchmark_startup(args):
+    """
+    Compare startup time and memory per worker of eagerly constructed Word2word objects (previous approach)
+    with lazily loaded, memory-mapped lexicons. Lexicon files are built on the first lazy run.
+    """
+    eager_setup = (f'from word2word import Word2word\n'
+                   f'pairs = {{language: (Word2word(language, "en"), Word2word("en", language)) '
+                   f'for language in {args.languages!r}}}')
+    eager_query = (f'english = pairs["{args.source}"][0]("{args.word}")[0]\n'
+                   f'for _, en2target in pairs.values():\n'
+                   f'    try:\n'
+                   f'        en2target(english)\n'
+                   f'    except KeyError:\n'
+                   f'        pass')
+    lazy_setup = 'import translate'
+    lazy_query = f'translate.multilang_text_translate("{args.source}", ["{args.word}"])'
+
+    for label, setup, query in [('eager', eager_setup, eager_query), ('lazy', lazy_setup, lazy_query),
+                                ('lazy (built)', lazy_setup, lazy_query)]:
+        output = subprocess.run([sys.executable, '-c', __startup_script.format(setup=setup, query=query)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f'{label:>12}: ready after {result["ready"]:7.2f}s | first query after {result["firstQuery"]:7.2f}s | '
+              f'RSS {result["rss"]:7.1f}MiB | private {result["private"]:7.1f}MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the word2word api')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    synonym_parser = subparsers.add_parser('synonyms', help='regex scan vs. synonym index')
+    synonym_parser.add_argument('--entries', type=int, default=100000, help='entries of the generated synonym file')
+    synonym_parser.add_argument('--queries', type=int, default=10, help='number of measured queries')
+    synonym_parser.set_defaults(func=benchmark_synonyms)
+
+    startup_parser = subparsers.add_parser('startup', help='eager Word2word objects vs. lazy memory-mapped lexicons')
+    startup_parser.add_argument('--languages', nargs='+', default=['de', 'fr', 'ca', 'it', 'es', 'ru', 'pl', 'bn', 'da'],
+                                help='languages of the eagerly loaded pairs')
+    startup_parser.add_argument('--source', type=str, default='de', help='language of the first query')
+    startup_parser.add_argument('--word', type=str, default='haus', help='word of the first query')
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+suffix = '.lex'
+magic = b'W2WL'
+version = 1
+# magic, version, word count
+header = struct.Struct('<4sII')
+n_best = 5
+logger = logging.getLogger(__name__)
+
+
+def write(path, entries):
+    """
+    Write a bilingual lexicon in a compact, memory-mappable format:
+    a fixed header followed by uint32 offset tables of words and translations and two utf-8 blobs.
+    Words are sorted by their utf-8 encoding, translations of a word are joined by tabs
+    (an empty translation list is read back as empty list).
+    The file is written atomically.
+
+    :param path: target file path
+    :param entries: iterable of (word, [translations]) tuples
+    """
+    encoded_entries = sorted((word.encode(), '\t'.join(translations).encode()) for word, translations in entries)
+    word_offsets, translation_offsets = array('I', [0]), array('I', [0])
+    for word, translations in encoded_entries:
+        word_offsets.append(word_offsets[-1] + len(word))
+        translation_offsets.append(translation_offsets[-1] + len(translations))
+
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header.pack(magic, version, len(encoded_entries)))
+        file.write(word_offsets.tobytes())
+        file.write(translation_offsets.tobytes())
+        for word, _ in encoded_entries:
+            file.write(word)
+        for _, translations in encoded_entries:
+            file.write(translations)
+    os.replace(temp_path, path)
+
+
+def build(source, target, path):
+    """
+    Convert a word2word lexicon (downloaded on first use) to the compact format.
+    Only the best n_best translations of each word are kept, matching the default of Word2word.__call__.
+    """
+    from word2word import Word2word
+
+    pair = Word2word(source, target)
+    entries = []
+    for word in pair.word2x:
+        try:
+            entries.append((word, pair(word, n_best=n_best)))
+        except KeyError:
+            # words without any translation
+            pass
+    write(path, entries)
+
+
+class Lexicon:
+    """
+    Read-only, memory-mapped lexicon written by write().
+    The file's pages live in the OS page cache, so all worker processes share one copy of the lexicon.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.__buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, file_version, self.__count = header.unpack_from(self.__buffer)
+        if file_magic != magic or file_version != version:
+            self.__buffer.close()
+            raise ValueError(f'{path} is no lexicon file (version {version})')
+        table_size = 4 * (self.__count + 1)
+        view = memoryview(self.__buffer)
+        self.__word_offsets = view[header.size:header.size + table_size].cast('I')
+        self.__translation_offsets = view[header.size + table_size:header.size + 2 * table_size].cast('I')
+        self.__words_start = header.size + 2 * table_size
+        self.__translations_start = self.__words_start + self.__word_offsets[self.__count]
+
+    def __word(self, i):
+        return self.__buffer[self.__words_start + self.__word_offsets[i]:self.__words_start + self.__word_offsets[i + 1]]
+
+    def __getitem__(self, word):
+        """
+        :return: list of the best translations of word
+        :raises KeyError: if the lexicon has no translation for word
+        """
+        encoded_word = word.encode()
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__word(middle) < encoded_word:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.__count or self.__word(low) != encoded_word:
+            raise KeyError(word)
+        start = self.__translations_start + self.__translation_offsets[low]
+        end = self.__translations_start + self.__translation_offsets[low + 1]
+        # words with an empty translation list (as returned by Word2word) are stored as empty value
+        return self.__buffer[start:end].decode().split('\t') if end > start else []
+
+    def __len__(self):
+        return self.__count
+
+
+class LanguagePair:
+    """
+    Drop-in replacement of a Word2word object, that loads its lexicon on first use.
+    Missing lexicon files are built from the word2word data once, concurrent builds of other processes are
+    serialized with a file lock.
+    """
+
+    def __init__(self, source, target, lexicon_dir):
+        self.source = source
+        self.target = target
+        self.path = f'{lexicon_dir}/{source}2{target}{suffix}'
+        self.__lexicon = None
+        self.__lock = threading.Lock()
+
+    def load(self):
+        with self.__lock:
+            if self.__lexicon is not None:
+                return
+            if not os.path.exists(self.path):
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(f'{self.path}.lock', 'w') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if not os.path.exists(self.path):
+                        logger.info('Building lexicon %s', self.path)
+                        build(self.source, self.target, self.path)
+            self.__lexicon = Lexicon(self.path)
+            logger.info('Loaded %d words from lexicon %s', len(self.__lexicon), self.path)
+
+    def __call__(self, word):
+        if self.__lexicon is None:
+            self.load()
+        return self.__lexicon[word]
+
+
+def main():
+    logging.basicConfig(level='INFO')
+    parser = argparse.ArgumentParser(description='Build compact lexicon files of language pairs (to and from English)')
+    parser.add_argument('languages', nargs='+', help='language codes, e.g. de fr')
+    parser.add_argument('--dir', type=str, default='lexicons', help='lexicon folder (default: lexicons)')
+    args = parser.parse_args()
+    for language in args.languages:
+        LanguagePair(language, 'en', args.dir).load()
+        LanguagePair('en', language, args.dir).load()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 import csv
 import configparser
+import logging
+import os
 import re
+import threading
 
 config = configparser.ConfigParser()
 config.read('config.ini')
 config = config['synonyms']
-synonym_map = {}
+logger = logging.getLogger(__name__)
+word_boundary = re.compile(r'\b')
 
 
 def __remove_parenthesis(text: str):
@@ -17,30 +21,60 @@ def __remove_parenthesis(text: str):
     return result.strip()
 
 
-def __add_term(main_term, row):
-    try:
-        synonym_map[main_term] += row[1:]
-    except KeyError:
-        synonym_map[main_term] = row[1:]
+class SynonymIndex:
+    """
+    Character trie over all main terms of the synonym file.
+    A main term matches, if it occurs in the query text starting at a word boundary (like re.search(r'\b' + term)),
+    so lookups only depend on the query length and the longest main term, not on the size of the synonym file.
+    """
 
+    def __init__(self):
+        self.synonym_map = {}
+        self.__main_terms = []
+        self.__root = {}
 
-def find_synonyms(term_list: list):
-    terms = " ".join(term_list)
-    result = []
+    def add(self, main_term, synonyms):
+        try:
+            self.synonym_map[main_term] += synonyms
+        except KeyError:
+            self.synonym_map[main_term] = list(synonyms)
+            node = self.__root
+            for char in main_term:
+                node = node.setdefault(char, {})
+            # '' never is a character, so it marks the end of a main term and stores its position in the file
+            node[''] = len(self.__main_terms)
+            self.__main_terms.append(main_term)
+
+    def find(self, terms: str):
+        """
+        :param terms: query text
+        :return: list of matching main terms in synonym file order
+        """
+        matches = set()
+        for start in [match.start() for match in word_boundary.finditer(terms)]:
+            node = self.__root
+            if '' in node:
+                matches.add(node[''])
+            for char in terms[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                if '' in node:
+                    matches.add(node[''])
+        return [self.__main_terms[i] for i in sorted(matches)]
 
-    for main_term, synonyms in synonym_map.items():
-        if re.search(r'\b'+main_term, terms) is not None:
-            result.append({
-                'mainTerm': main_term,
-                'terms': synonyms
-            })
-    return result
+    def __len__(self):
+        return len(self.__main_terms)
 
 
-if config.getboolean('enabled'):
-    with open(config['input'], 'r') as f:
+def load_index(path):
+    """
+    Build a synonym index from a synonym file
+    :param path: tab separated file in this format: main-phrase <tab> synonym 1 <tab> synonym 2 <tab> synonym 3 <tab> …
+    """
+    index = SynonymIndex()
+    with open(path, 'r') as f:
         reader = csv.reader(f, delimiter="\t")
-        # tab separated file in this format: main-phrase <tab> synonym 1 <tab> synonym 2 <tab> synonym 3 <tab> …
         # main-term is (currently) always english, while the synonyms can be multilingual
         for row in reader:
             main_term = row[0]
@@ -49,4 +83,46 @@ if config.getboolean('enabled'):
                 main_term = __remove_parenthesis(main_term)
 
             for term in main_term.split('/'):
-                __add_term(term, row)
+                index.add(term, row[1:])
+    return index
+
+
+index = SynonymIndex()
+__index_mtime = None
+__index_lock = threading.Lock()
+
+
+def __current_index():
+    """
+    :return: synonym index of the configured synonym file - reloaded if the file was modified since it was loaded
+    """
+    global index, __index_mtime
+    if not config.getboolean('enabled'):
+        return index
+    try:
+        mtime = os.stat(config['input']).st_mtime_ns
+    except OSError:
+        # keep serving the loaded index while the file is being replaced
+        return index
+    if mtime != __index_mtime:
+        with __index_lock:
+            if mtime != __index_mtime:
+                try:
+                    index = load_index(config['input'])
+                    logger.info('Loaded %d synonym main terms from %s', len(index), config['input'])
+                except (OSError, csv.Error, UnicodeDecodeError) as e:
+                    logger.warning('Failed to load synonyms from %s, keeping previous index: %s', config['input'], e)
+                __index_mtime = mtime
+    return index
+
+
+def find_synonyms(term_list: list):
+    terms = " ".join(term_list)
+    current_index = __current_index()
+    return [{
+        'mainTerm': main_term,
+        'terms': current_index.synonym_map[main_term]
+    } for main_term in current_index.find(terms)]
+
+
+__current_index()
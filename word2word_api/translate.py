@@ -1,52 +1,24 @@
+import configparser
+import copy
+import logging
+import threading
 import unicodedata
+from functools import lru_cache
 
-from word2word import Word2word
-
-de2en = Word2word('de', 'en')
-fr2en = Word2word('fr', 'en')
-ca2en = Word2word('ca', 'en')
-it2en = Word2word('it', 'en')
-es2en = Word2word('es', 'en')
-ru2en = Word2word('ru', 'en')
-pl2en = Word2word('pl', 'en')
-bn2en = Word2word('bn', 'en')
-# cy2en = Word2word('cy', 'en') - Not supported by word2word
-da2en = Word2word('da', 'en')
-
-en2de = Word2word('en', 'de')
-en2fr = Word2word('en', 'fr')
-en2ca = Word2word('en', 'ca')
-en2it = Word2word('en', 'it')
-en2es = Word2word('en', 'es')
-en2ru = Word2word('en', 'ru')
-en2pl = Word2word('en', 'pl')
-en2bn = Word2word('en', 'bn')
-# en2cy = Word2word('en', 'cy') - Not supported by word2word
-en2da = Word2word('en', 'da')
-
-source_map = {
-    'de': de2en,
-    'fr': fr2en,
-    'ca': ca2en,
-    'it': it2en,
-    'es': es2en,
-    'ru': ru2en,
-    'pl': pl2en,
-    'bn': bn2en,
-    'da': da2en,
-}
-
-target_map = {
-    'de': en2de,
-    'fr': en2fr,
-    'ca': en2ca,
-    'it': en2it,
-    'es': en2es,
-    'ru': en2ru,
-    'pl': en2pl,
-    'bn': en2bn,
-    'da': en2da,
-}
+from lexicon import LanguagePair
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+config = config['translate'] if config.has_section('translate') else {}
+logger = logging.getLogger(__name__)
+lexicon_dir = config.get('lexicon-dir', 'lexicons')
+
+# cy (Welsh) is not supported by word2word
+languages = ['de', 'fr', 'ca', 'it', 'es', 'ru', 'pl', 'bn', 'da']
+
+# language pairs are loaded on first use (or preloaded in the background, see __preload)
+source_map = {language: LanguagePair(language, 'en', lexicon_dir) for language in languages}
+target_map = {language: LanguagePair('en', language, lexicon_dir) for language in languages}
 
 supported_languages = list(source_map.keys())
 
@@ -65,6 +37,21 @@ class TranslationException(Exception):
     pass
 
 
+def __preload(preload_languages):
+    for language in preload_languages:
+        try:
+            source_map[language].load()
+            target_map[language].load()
+        except Exception:
+            logger.exception('Failed to preload language pairs of %s', language)
+
+
+# preloading runs in the background, so the service answers health checks right away
+threading.Thread(target=__preload, daemon=True,
+                 args=([language.strip() for language in config.get('preload', '').split(',')
+                        if language.strip() in source_map],)).start()
+
+
 def main():
     # word_translate('de', 'es', 'Baum')
     # text_translate('de', 'es', 'Das ist ein Baum'.split(' '))
@@ -75,6 +62,16 @@ def get_supported_languages():
     return supported_languages + ['en']
 
 
+def multilang_batch_translate(queries):
+    """
+    Dictionary translate multiple queries from their source language to all other supported languages
+
+    :param queries: list of (source language, words) tuples
+    :return: list of translations per query (see multilang_text_translate)
+    """
+    return [multilang_text_translate(source, words) for source, words in queries]
+
+
 def multilang_text_translate(source, words: [str]):
     """
     Dictionary translate a list of words from source language to all other supported languages
@@ -82,20 +79,26 @@ def multilang_text_translate(source, words: [str]):
     :param source: The source language
     :param words: Words to be translated
     :return: Best translation options in all target languages, or the original text if no translation was found
+             (results are cached, the returned structure is a copy and may be modified)
     """
+    return copy.deepcopy(__multilang_text_translate(source, tuple(words)))
+
+
+@lru_cache(maxsize=int(config.get('query-cache-size', 1000)))
+def __multilang_text_translate(source, words: tuple):
     translations = [
-        {"languageCode": source, "content": words}
+        {"languageCode": source, "content": list(words)}
     ]
     english_words = []
     english_words_filtered = []
     for word in words:
-        try:
-            translated_word = to_english(source, word)
+        translated_word = __english_translation(source, word)
+        if translated_word is not None:
             english_words.append(translated_word)
             if translated_word not in stopwords:
                 # filter out stopwords before translating into other languages
                 english_words_filtered.append(translated_word)
-        except TranslationException:
+        else:
             # do not further translate words, that have no english translation
             english_words_filtered.append('')
     if source == 'en':
@@ -108,7 +111,7 @@ def multilang_text_translate(source, words: [str]):
 
     for language in [language for language in supported_languages if language != source]:
         translations.append(
-            {"languageCode": language, "content": text_translate('en', language, english_words_filtered)}
+            {"languageCode": language, "content": [to_target(language, word) for word in english_words_filtered]}
         )
 
     return translations
@@ -144,6 +147,15 @@ def word_translate(source, target, word):
 
 
 def to_english(source, word):
+    translation = __english_translation(source, word)
+    if translation is None:
+        raise TranslationException
+    return translation
+
+
+@lru_cache(maxsize=int(config.get('cache-size', 100000)))
+def __english_translation(source, word):
+    # missing translations are cached as None, since lru_cache does not cache exceptions
     if source == 'en' or source == 'un':
         translations = [word]
     else:
@@ -152,26 +164,47 @@ def to_english(source, word):
         except KeyError:
             # Fired when source language is non-existent,
             # or there is no translation for the word
-            raise TranslationException
+            return None
 
-    print(f"Intermediate translation for '{word}' from {source} to en: {translations}")
+    logger.debug("Intermediate translation for '%s' from %s to en: %s", word, source, translations)
     translation = get_first_valid_translation(translations, word)
-    print(f'Picking best option {translation}')
+    logger.debug('Picking best option %s', translation)
 
     return translation
 
 
+@lru_cache(maxsize=int(config.get('cache-size', 100000)))
 def to_target(target, word):
     try:
         translations = target_map[target](word)
     except KeyError:
         translations = [word]
-    print(f"Translation for '{word}' from en to {target}: {translations}")
+    logger.debug("Translation for '%s' from en to %s: %s", word, target, translations)
     translation = get_first_valid_translation(translations, word)
-    print(f'Picking best option {translation}')
+    logger.debug('Picking best option %s', translation)
     return translation
 
 
+def cache_stats():
+    """
+    :return: statistics of the translation caches by name
+    """
+    stats = {}
+    for name, cached_function in [('queries', __multilang_text_translate),
+                                  ('toEnglish', __english_translation),
+                                  ('toTarget', to_target)]:
+        info = cached_function.cache_info()
+        requests = info.hits + info.misses
+        stats[name] = {
+            'size': info.currsize,
+            'maxSize': info.maxsize,
+            'hits': info.hits,
+            'misses': info.misses,
+            'hitRatio': info.hits / requests if requests else 0.0
+        }
+    return stats
+
+
 def get_first_valid_translation(translation_list, fallback_word):
     for term in translation_list:
         if only_letters(term):